@@ -0,0 +1,104 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from linparse import ObjectiveFunction, Constraint, Constraints, model_naming
+from linprog import LinearProgramming
+
+
+"""
+Solve many independent linear programs across a pool of processes
+
+    results = solve_many([("max z = 3x1 + 2x2", ["x1 + x2 <= 4", "x1 + 3x2 <= 6"]), ...], workers=4)
+    print(results.throughput, "problems/sec")
+"""
+
+
+class ProblemResult:
+    """Outcome of one problem of a batch, failures are reported here instead of raised"""
+
+    def __init__(self, index, status, vbs=None, b=None, z=None, iterations=0, error=None):
+        # position of the problem in the input
+        self.index = index
+        # a solve status of `linprog` ( "optimal", "infeasible", "unbounded", ... ) or "error"
+        self.status = status
+
+        self.vbs = vbs
+        self.b = b
+        self.z = z
+        self.iterations = iterations
+
+        # error message when status is "error"
+        self.error = error
+
+    def __repr__(self):
+        if self.status == "error":
+            return f"ProblemResult({self.index}, {self.status}, error={self.error!r})"
+        return f"ProblemResult({self.index}, {self.status}, z={self.z})"
+
+
+class BatchResults(list):
+    """Results of `solve_many` in input order, along with the batch timing"""
+
+    def __init__(self, results, elapsed):
+        super().__init__(results)
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """Solved problems per second"""
+        return len(self) / self.elapsed if self.elapsed else float("inf")
+
+
+@model_naming()
+def _parse_problem(problem):
+    """Returns (ObjectiveFunction, Constraints) from a problem tuple, items can be either parsed objects or strings"""
+    objfunc, constraints = problem
+    if isinstance(objfunc, str):
+        objfunc = ObjectiveFunction(objfunc)
+    if isinstance(constraints, (str, Constraint)):
+        constraints = [constraints]
+    if not isinstance(constraints, Constraints):
+        constraints = Constraints.from_iterable(constraints)
+    return objfunc, constraints
+
+
+def _solve_one(job):
+    index, problem, engine, options = job
+    try:
+        linprog = LinearProgramming(*_parse_problem(problem))
+        result = linprog.silent_calc(engine, **options)
+    except Exception as e:
+        message = getattr(e, "message", None) or str(e)
+        return ProblemResult(index, "error", error=f"{type(e).__name__}: {message}")
+
+    if not result.success:
+        return ProblemResult(index, result.status, iterations=linprog.iterations)
+    return ProblemResult(index, result.status,
+                         vbs=list(linprog.vbs[0]),
+                         b=[ float(b) for b in linprog.b ],
+                         z=float(linprog.z),
+                         iterations=linprog.iterations)
+
+
+def solve_many(problems, workers=None, chunksize=None, engine="tableau", **options):
+    """
+    Solves every (objective, constraints) pair of `problems` and returns a `BatchResults` in input order.
+    The objective can be an `ObjectiveFunction` or a string, the constraints a `Constraints`, a `Constraint`
+    or an iterable of `Constraint` objects / strings.
+    Problems are sent to a pool of `workers` processes ( all cores by default, 1 solves in this process )
+    in chunks of `chunksize` problems.
+    """
+    jobs = [ (index, problem, engine, options) for index, problem in enumerate(problems) ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        # a few chunks per worker, so that a slow chunk does not keep the others waiting
+        chunksize = max(1, len(jobs) // (workers * 4))
+
+    start = time.perf_counter()
+    if workers <= 1 or len(jobs) <= 1:
+        results = [ _solve_one(job) for job in jobs ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve_one, jobs, chunksize=chunksize))
+    return BatchResults(results, time.perf_counter() - start)
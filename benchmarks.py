@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import re
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from linparse import ObjectiveFunction, Constraint, Constraints, _LinearParsing
+from linprog import LinearProgramming, Tableau, pivot_tableau
+from pricing import PRICING_RULES
+
+
+"""
+Benchmarks for the hot paths of the simplex solver
+
+    python benchmarks.py pivot --sizes 100 500 1000 5000
+    python benchmarks.py build --rows 500 1000 2000
+    python benchmarks.py parse --rows 10000 50000 --terms 5 50
+    python benchmarks.py pricing --sizes 50 100 200
+    python benchmarks.py memory --sizes 1000 2000 --pivots 5
+"""
+
+
+def _loop_pivot(A, b, pivrow, pivcol):
+    """The element by element pivot `LinearProgramming.next_iter` used before the NumPy kernel"""
+    pivot = A[pivrow, pivcol]
+    next_A = A.copy()
+    next_A[pivrow] /= pivot
+    next_A[:, pivcol] = 0
+    next_A[pivrow, pivcol] = 1
+    for irow, row in enumerate(A):
+        a = A[irow, pivcol]
+        for icolumn, column in enumerate(row):
+            if irow == pivrow or icolumn == pivcol:
+                continue
+            b_cell = A[pivrow, icolumn]
+            next_A[irow, icolumn] = A[irow, icolumn] - ( ( a * b_cell ) / pivot )
+
+    b = list(b)
+    b_pivot = b[pivrow]
+    for irow, cell in enumerate(b):
+        b[irow] = b[irow] - A[irow, pivcol] * b_pivot / pivot
+    b[pivrow] = b_pivot / pivot
+    return next_A, b
+
+
+def _timeit(function, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_pivot(sizes, repeat=3, loop_repeat=1):
+    """Compares the rank-1 pivot kernel with the old Python loop on square tableaus"""
+    rng = np.random.default_rng(0)
+    print(f"{'size':>12} {'loop (s)':>12} {'kernel (s)':>12} {'speedup':>10}")
+    for size in sizes:
+        A = rng.random((size, size)) + 0.5
+        b = rng.random(size) * 100
+        pivrow, pivcol = size // 2, size // 3
+
+        loop = _timeit(lambda: _loop_pivot(A, b, pivrow, pivcol), loop_repeat)
+        kernel = _timeit(lambda: pivot_tableau(np.column_stack((A, b)), pivrow, pivcol), repeat)
+
+        # both must agree before their timings mean anything
+        next_A, next_b = _loop_pivot(A, b, pivrow, pivcol) if size <= 500 else (None, None)
+        if next_A is not None:
+            tableau = pivot_tableau(np.column_stack((A, b)), pivrow, pivcol)
+            assert np.allclose(tableau[:, :-1], next_A) and np.allclose(tableau[:, -1], next_b)
+
+        print(f"{f'{size}x{size}':>12} {loop:12.4f} {kernel:12.4f} {loop / kernel:9.1f}x")
+
+
+def _generate_rows(count, nvars, per_row=5, seed=0):
+    """Random sparse constraint strings over the variables x1..x`nvars`"""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        variables = rng.choice(np.arange(1, nvars + 1), size=per_row, replace=False)
+        terms = " + ".join(f"{rng.integers(1, 20)}x{var}" for var in variables)
+        yield f"{terms} <= {rng.integers(10, 1000)}"
+
+
+def bench_build(counts, nvars=9):
+    """Compares chained `Constraint` additions with `Constraints.from_iterable`"""
+    print(f"{'rows':>8} {'chained (s)':>12} {'from_iterable (s)':>18} {'speedup':>10}")
+    for count in counts:
+        constraints = [ Constraint(row) for row in _generate_rows(count, nvars) ]
+
+        def chained():
+            model = constraints[0]
+            for constraint in constraints[1:]:
+                model = model + constraint
+            return model
+
+        chain = _timeit(chained, 1)
+        bulk = _timeit(lambda: Constraints.from_iterable(constraints), 3)
+        print(f"{count:>8} {chain:12.4f} {bulk:18.4f} {chain / bulk:9.1f}x")
+
+
+SPLITTER = re.compile(r"(\+|\-)")
+TERM = re.compile(r"^\s*(?P<op>[\-\+])?\s*(?P<a>\d*(\.\d*)?)\s*(?P<var>\w+\d*)\s*$")
+
+
+def _split_parse(expression):
+    """The split / regex per term / quadratic duplicate scan parsing `linparse` used before the scanner"""
+    parts = SPLITTER.split(expression)
+    if not parts[0]:
+        parts.pop(0)
+    if parts[0] not in '-+':
+        parts.insert(0, '+')
+    varnames, z = [], []
+    for op, term in zip(parts[0::2], parts[1::2]):
+        match = TERM.fullmatch(op.strip() + term.strip())
+        varnames.append(match['var'])
+        z.append(float((match['op'] or '+') + (match['a'] or '1')))
+    duplicates = [ i for i, var in enumerate(varnames) if var in varnames[:i] ]
+    for i in duplicates:
+        z[varnames.index(varnames[i])] += z[i]
+    return [ var for i, var in enumerate(varnames) if i not in duplicates ], [ c for i, c in enumerate(z) if i not in duplicates ]
+
+
+def bench_parse(counts, terms, nvars=1000):
+    """Compares the split and match parsing with the single pass scanner on constraint left parts"""
+    print(f"{'rows':>8} {'terms':>6} {'split (s)':>12} {'scanner (s)':>12} {'speedup':>10}")
+    for per_row in terms:
+        for count in counts:
+            rows = [ row.split("<=")[0] for row in _generate_rows(count, max(nvars, per_row), per_row) ]
+            for row in rows[:100]:
+                scanned = _LinearParsing.scan(row)
+                assert _split_parse(row) == (list(scanned), list(scanned.values()))
+
+            split = _timeit(lambda: [ _split_parse(row) for row in rows ], 1)
+            scanner = _timeit(lambda: [ _LinearParsing.scan(row) for row in rows ], 3)
+            print(f"{count:>8} {per_row:>6} {split:12.4f} {scanner:12.4f} {split / scanner:9.1f}x")
+
+
+# the problems of `tests.py`
+TEST_PROBLEMS = [
+    ("max z = 7t1 + 5t2 + 4t3", ["t1 + t2 + t3 <= 25", "2t1 + t2 + t3 <= 100", "t1 + t2 >= -1", "t2 + t3 >= 5"]),
+    ("max Z = 24x1 + 20 x2", ["x1 + x2 <= 30", "x1 + 2 x2 >= 40"]),
+    ("max W = 7x1 + 5x2 + 5x3 + 4x4", ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70",
+                                       "x1 + x3 <= 50", "x2 + x4 <= 60"]),
+    ("max f = 9x1 + 8 x2 + 3x3 + 4x4 + 6x5 + 7 x6", ["4x1 + 3x2 -x3 + x6 <= 100", "3x2 + 12 x3 + 17 x4 + 20 x5 <= 1000",
+                                                     "3x3 + x5 + 12x6 <= 520", "x1 + x5 >= 60", "x3 + x5 + 3 x6 <= 300"]),
+    ("max f = 5x1 + 6x2", ["x1 + x2 <= 10", "5x1 + 4x2 <= 35"]),
+    ("min f = 100x1 + 50x2 + 200x3", ["x1 + x2 + x3 = 3000", "8x1 + 14x2 + 10x3 <= 42000", "10x1 + 12x2 + 6x3 <= 24000",
+                                      "30x1 + 20x2 + 30x3 >= 75000", "10x1 + 10x2 + 15x3 >= 36000"]),
+    ("min z = 45x1 + 54x2 + 42x3 + 36x4", ["x1 + x2 + x3 + x4 = 1600", "30x1 + 60x2 + 70x3 + 80x4 = 100000",
+                                           "30x1 + 40x2 + 20x4 = 30000"]),
+]
+
+
+def _generate_problem(size, seed=0):
+    """A dense `max` problem with `size` variables and `size` // 2 `<=` constraints, feasible at the origin"""
+    rng = np.random.default_rng(seed)
+    objective = "max z = " + " + ".join(f"{rng.integers(1, 50)}x{j}" for j in range(1, size + 1))
+    rows = [ " + ".join(f"{rng.integers(1, 30)}x{j}" for j in range(1, size + 1)) + f" <= {rng.integers(100, 1000)}"
+             for _ in range(size // 2) ]
+    return objective, rows
+
+
+def bench_pricing(sizes, engine="tableau"):
+    """Iterations and solve time of every pricing rule, on the `tests.py` problems and on generated ones"""
+    problems = [ (f"test{k}", problem) for k, problem in enumerate(TEST_PROBLEMS, 1) ]
+    problems += [ (f"{size} vars", _generate_problem(size)) for size in sizes ]
+    print(f"{'problem':>10} " + " ".join(f"{rule + ' (it, s)':>20}" for rule in PRICING_RULES))
+    for name, (objective, rows) in problems:
+        objfunc, constraints = ObjectiveFunction(objective), Constraints.from_iterable(rows)
+        cells = []
+        for rule in PRICING_RULES:
+            linprog = LinearProgramming(objfunc, constraints, pricing=rule)
+            start = time.perf_counter()
+            # phase 2 of a two-phase solve still shows its tableaus
+            with contextlib.redirect_stdout(io.StringIO()):
+                linprog.silent_calc(engine)
+            elapsed = time.perf_counter() - start
+            cells.append(f"{linprog.iterations:>8} {elapsed:11.4f}")
+        print(f"{name:>10} " + " ".join(cells))
+
+
+def _copying_pivot(A, b, pivrow, pivcol):
+    """The pivot `Tableau` did before it worked in place: a new tableau and an outer product every time"""
+    tableau = np.column_stack((A, b))
+    pivot_row = tableau[pivrow] / tableau[pivrow, pivcol]
+    tableau -= np.outer(tableau[:, pivcol], pivot_row)
+    tableau[pivrow] = pivot_row
+    return tableau[:, :-1], tableau[:, -1]
+
+
+def _peak_rss():
+    """Peak resident set size of this process in MB ( Linux reports kB )"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pivot_memory(job):
+    """Tableau MB, peak RSS growth MB and seconds per pivot of `pivots` pivots on a (size, 2 size) tableau"""
+    size, dtype, pivots, in_place = job
+    rng = np.random.default_rng(0)
+    # generated in place, so the peak before the pivots is A itself
+    A = rng.random((size, 2 * size), dtype=dtype)
+    A += 0.5
+    b = rng.random(size) * 100
+    before = _peak_rss()
+    start = time.perf_counter()
+    if in_place:
+        engine = Tableau(A, b, dtype=dtype)
+        del A
+        for k in range(pivots):
+            engine.pivot(k, k)
+    else:
+        for k in range(pivots):
+            A, b = _copying_pivot(A, b, k, k)
+    elapsed = time.perf_counter() - start
+    return size * (2 * size + 1) * np.dtype(dtype).itemsize / 2**20, _peak_rss() - before, elapsed / pivots
+
+
+def bench_memory(sizes, pivots=5):
+    """Peak RSS of in place pivots ( float64 and float32 ) against copying ones, every run in a fresh process"""
+    spawn = multiprocessing.get_context("spawn")
+    print(f"{'size':>12} {'dtype':>8} {'pivot':>8} {'tableau (MB)':>13} {'peak RSS + (MB)':>16} {'ms / pivot':>11}")
+    for size in sizes:
+        for dtype, in_place in (("float64", False), ("float64", True), ("float32", True)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                tableau, peak, seconds = executor.submit(_pivot_memory, (size, dtype, pivots, in_place)).result()
+            mode = "in place" if in_place else "copying"
+            print(f"{f'{size}x{2 * size}':>12} {dtype:>8} {mode:>8} {tableau:13.1f} {peak:16.1f} {seconds * 1000:11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplex solver benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pivot = commands.add_parser("pivot", help="pivot kernel against the Python loop")
+    pivot.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000])
+    pivot.add_argument("--repeat", type=int, default=3)
+
+    build = commands.add_parser("build", help="chained constraint additions against the bulk builder")
+    build.add_argument("--rows", type=int, nargs="+", default=[500, 1000, 2000])
+
+    parse = commands.add_parser("parse", help="split and match parsing against the single pass scanner")
+    parse.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    parse.add_argument("--terms", type=int, nargs="+", default=[5, 50])
+
+    pricing = commands.add_parser("pricing", help="iterations and time of every pricing rule")
+    pricing.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    pricing.add_argument("--engine", default="tableau")
+
+    memory = commands.add_parser("memory", help="peak RSS of in place and copying pivots")
+    memory.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000])
+    memory.add_argument("--pivots", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "pivot":
+        bench_pivot(args.sizes, repeat=args.repeat)
+    elif args.command == "build":
+        bench_build(args.rows)
+    elif args.command == "parse":
+        bench_parse(args.rows, args.terms)
+    elif args.command == "pricing":
+        bench_pricing(args.sizes, args.engine)
+    elif args.command == "memory":
+        bench_memory(args.sizes, args.pivots)
+
+
+if __name__ == "__main__":
+    main()
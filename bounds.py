@@ -0,0 +1,80 @@
+import numpy as np
+from linparse import Constraint, ConstraintsBuilder
+
+
+"""
+Lower and upper bounds of variables, kept out of the constraint rows
+
+A bound like `x3 <= 50` written as a constraint costs a whole tableau row and a slack column,
+the bounded simplex ( `LinearProgramming(..., bounds=...)` ) handles it in the ratio test instead:
+
+    - `split_bounds` lifts the single variable rows of a model out as bounds
+    - `shift_lower` substitutes xj = lj + xj' so that every variable starts at 0 again,
+      only the upper bounds ( uj - lj ) are left for the simplex
+"""
+
+
+def normalize(bounds):
+    """{var: (lower, upper)} with None for the default lower 0 / no upper bound"""
+    normalized = {}
+    for var, (lower, upper) in bounds.items():
+        lower = 0.0 if lower is None else float(lower)
+        upper = np.inf if upper is None else float(upper)
+        normalized[var] = (lower, upper)
+    return normalized
+
+
+def tighten(bounds, other):
+    """The tightest of the two bound dicts, variable by variable"""
+    merged = dict(bounds)
+    for var, (lower, upper) in other.items():
+        current = merged.get(var, (0.0, np.inf))
+        merged[var] = (max(current[0], lower), min(current[1], upper))
+    return merged
+
+
+def _single_variable(constraint):
+    """(var, written coefficient) of a constraint with only one nonzero written term, None otherwise"""
+    terms = [ (var, constraint.sign * coef) for var, coef in
+              zip(constraint.varnames[:constraint.structural], constraint.a[:constraint.structural]) if coef != 0 ]
+    return terms[0] if len(terms) == 1 else None
+
+
+def split_bounds(constraints):
+    """
+    Returns the `constraints` without their single variable rows, and the bounds {var: (lower, upper)} these rows were.
+    A row is only lifted when its variable is in another row, and at least one row is always kept.
+    """
+    singles = [ _single_variable(c) for c in constraints.constraints ]
+    used = { var for c, single in zip(constraints.constraints, singles) if single is None
+             for var, coef in zip(c.varnames[:c.structural], c.a[:c.structural]) if coef != 0 }
+
+    kept, bounds = [], {}
+    for c, single in zip(constraints.constraints, singles):
+        if single is None or single[0] not in used:
+            kept.append(c)
+            continue
+        var, coef = single
+        value = float(c.sign * c.b / coef)
+        lower, upper = bounds.get(var, (0.0, np.inf))
+        if c.sense == "=":
+            lower, upper = max(lower, value), min(upper, value)
+        elif (c.sense == "<=") == (coef > 0):
+            upper = min(upper, value)
+        else:
+            lower = max(lower, value)
+        bounds[var] = (lower, upper)
+    if not kept:
+        return constraints, {}
+    return ConstraintsBuilder().extend(kept).build(), bounds
+
+
+def shift_lower(constraints, lower):
+    """Rebuilds `constraints` for the variables shifted by their `lower` bound {var: lj} ( b -= a lj )"""
+    builder = ConstraintsBuilder()
+    for c in constraints.constraints:
+        varnames = c.varnames[:c.structural]
+        written = [ c.sign * coef for coef in c.a[:c.structural] ]
+        b = c.sign * c.b - sum( coef * lower.get(var, 0.0) for var, coef in zip(varnames, written) )
+        builder.add(Constraint.from_terms(varnames, written, c.sense, b))
+    return builder.build()
@@ -0,0 +1,71 @@
+import hashlib
+import numpy as np
+from batch import _parse_problem
+from linprog import LinearProgramming
+from lru import LRUCache
+from symbols import SYMBOLS
+
+
+"""
+Cache of solve results, keyed by a canonical fingerprint of the model
+
+    result = cached_solve("max z = 3x1 + 2x2", ["x1 + x2 <= 4", "x1 + 3x2 <= 6"])
+    result = cached_solve(...)          # the same model again: no tableau is built
+    print(RESULTS.hits, RESULTS.misses)
+
+`RESULTS` keeps the last 1024 results in memory, use an `LRUCache(maxsize, path)` of your own
+for another size or to also keep the results on disk ( across processes and restarts ).
+"""
+
+
+def fingerprint(objfunc, constraints, engine="tableau", **options):
+    """
+    Canonical hash of a parsed problem: the written variables sorted, A and b as written ( before the
+    standard form ) as bytes, the objective and its sense, so the names generated for slack and
+    artificial variables do not change it
+    """
+    written = SYMBOLS.ordered({ var for c in constraints.constraints for var in c.varnames[:c.structural] }
+                              | set(objfunc.varnames))
+    position = {var: j for j, var in enumerate(written)}
+    columns = np.array([ position.get(var, -1) for var in constraints.varnames ], dtype=np.intp)
+
+    matrix = constraints.matrix
+    signs = np.asarray(constraints.signs, dtype=float)
+    keep = columns[matrix.cols] >= 0
+    rows, cols = matrix.rows[keep], columns[matrix.cols[keep]]
+    order = np.lexsort((cols, rows))
+    costs = np.zeros(len(written))
+    costs[[ position[var] for var in objfunc.varnames ]] = objfunc.z
+    sense = "max" if objfunc.optimize in ("max", "maximize") else "min"
+
+    digest = hashlib.sha256()
+    for text in ("\0".join(written), sense, " ".join( c.sense for c in constraints.constraints ),
+                 f"{engine} {sorted(options.items())!r}"):
+        digest.update(text.encode() + b"\1")
+    for array in (rows[order], cols[order], (matrix.vals[keep] * signs[rows])[order],
+                  signs * np.asarray(constraints.b, dtype=float), costs):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+# results of `cached_solve`
+RESULTS = LRUCache()
+
+
+def cached_solve(objfunc, constraints, engine="tableau", cache=None, **options):
+    """
+    `LinearProgramming(objfunc, constraints).silent_calc(engine, **options)`, returned from `cache`
+    ( `RESULTS` by default ) when the same model was solved before.
+    The objective and the constraints are either parsed objects or strings ( see `batch.solve_many` ),
+    the returned `SolveResult` is shared by every hit, its arrays are read-only.
+    """
+    cache = RESULTS if cache is None else cache
+    objfunc, constraints = _parse_problem((objfunc, constraints))
+    key = fingerprint(objfunc, constraints, engine, **options)
+    result = cache.get(key)
+    if result is None:
+        result = LinearProgramming(objfunc, constraints).silent_calc(engine, **options)
+        cache.put(key, result)
+    result.values.flags.writeable = False
+    result.basis.flags.writeable = False
+    return result
@@ -1,6 +1,13 @@
+import copy
+import itertools
 import re
 import numpy as np
-from utils import sorter1, sorter2
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sparse import CooMatrix
+from symbols import SYMBOLS
+from profiling import timed
+from lru import LRUCache
 
 
 class NotValidObjectiveFunctionError(Exception):
@@ -13,81 +20,106 @@ class NotValidConstraintError(Exception):
         self.message = message
 
 
-class _LinearParsing:
+# (kind, expression with its blanks collapsed) -> what parsing it gave, immutable:
+#   ("objective", ...) -> (optimize, fname, varnames, z)
+#   ("constraint", ...) -> (varnames, a, op, b) before the standard form
+# models generated from templates repeat the same expressions, they are only parsed once
+PARSED = LRUCache(maxsize=8192)
 
-    OBJECTIVE_FUNCTION_SPLITTER = re.compile(r"(?P<op>\+|\-)")
-    LINEAR_PATTERN = re.compile(r"^\s*(?P<op>[\-\+])?\s*(?P<a>\d*(\.\d*)?)\s*(?P<var>\w+\d*)\s*$")
 
-    @staticmethod
-    def parse_linear(items: list, varnames: list, z: list): 
-        for item in items:
-            match = _LinearParsing.LINEAR_PATTERN.fullmatch(item)
-            if not match:
-                raise NotValidObjectiveFunctionError(f"Right part of the objective function does not match: '{item}'")
-            groupdict = match.groupdict()
-            var = groupdict['var']
-            operator = groupdict['op']
-            number = groupdict['a']
-
-            varnames.append(var)
-            # set default operator to + ( easy and quick math )
-            if not operator:
-                operator = "+"
-
-            # set default number to 1 when there isn't
-            if not number:
-                number = '1'
-
-            number = float(operator + number)
-            z.append(number)
+def _expression_key(kind, string):
+    return kind, " ".join(string.split())
 
-    @staticmethod
-    def fill_items(string: str, items: list):
-        split_result = _LinearParsing.OBJECTIVE_FUNCTION_SPLITTER.split(string)
-        if not split_result[0]:
-            # remove '' at first.
-            split_result.pop(0)
-        if split_result[0] not in '-+':
-            # not an operator, so we add '+' at first
-            split_result.insert(0, '+')
-        for operator_index, number_index in zip(range(0, len(split_result), 2), range(1, len(split_result), 2)):
-            operator, number = split_result[operator_index].strip(), split_result[number_index].strip()
-            items.append(operator + number)
 
-    @staticmethod
-    def remove_redundant_vars(varnames: list, z: list):
+class Naming:
+    """Numbers of the slack and artificial variables generated for one model, from 1"""
+
+    def __init__(self):
+        # `next` on a count is atomic, threads sharing a `Naming` never get the same number
+        self._slacks = itertools.count(1)
+        self._artificials = itertools.count(1)
+
+    def slack(self):
+        return next(self._slacks)
+
+    def artificial(self):
+        return next(self._artificials)
+
 
-        def get_redundant_vars():
-            # Thanks to Idriss.
-            items = [[], []]
-            for item in varnames:
-                if item in items[1]:
-                    continue
-                occurrences = [i for i, x in enumerate(varnames) if x == item]
-                if len(occurrences) > 1:
-                    # print(f"Redundancy detected for {item} in {occurrences}")
-                    items[0].append(tuple(occurrences))
-                items[1].append(item)
-            return items[0]
+# used outside of any `naming` block: every generated name is unique in the process
+_SHARED_NAMING = Naming()
+# the `Naming` of the model being built in this thread / task, see `naming`
+_NAMING = ContextVar("naming", default=_SHARED_NAMING)
 
-        redundant_vars = get_redundant_vars()
 
-        indexes_to_be_removed = set()
+@contextmanager
+def naming():
+    """
+    Numbers the slack and artificial variables of the constraints parsed in the block from 1 again,
+    so a model gets the same names every time it is built, whatever was built before or in other threads:
 
-        # print("Redundant vars: ", redundant_vars)
-        for index1, index2 in redundant_vars:
-            result = z[index1] + z[index2]
-            indexes_to_be_removed.add(index2)
-            z[index1] = result
+        with naming():
+            constraints = Constraints.from_iterable(rows)      # e1, e2, ... a1, ...
 
-        new_z = [ z for i, z in enumerate(z) if i not in indexes_to_be_removed ]
-        new_vars = [ var for i, var in enumerate(varnames) if i not in indexes_to_be_removed ]
+    Rows built in different blocks ( or in a block and outside of any ) can generate the same names,
+    the ones already used by a model are renamed when the rows are merged ( see `_unique_names` ).
+    The entry points building a whole model ( `Constraints.from_iterable`, `LinearProgramming`, `batch.solve_many`,
+    `cache.cached_solve`, `service.SolveService` ) open a block themselves when none is open, see `model_naming`.
+    """
+    token = _NAMING.set(Naming())
+    try:
+        yield
+    finally:
+        _NAMING.reset(token)
 
-        varnames.clear()
-        z.clear()
 
-        z.extend(new_z)
-        varnames.extend(new_vars)
+@contextmanager
+def model_naming():
+    """A `naming` block for the model built in it, unless the caller already opened one"""
+    if _NAMING.get() is not _SHARED_NAMING:
+        yield
+        return
+    with naming():
+        yield
+
+
+class _LinearParsing:
+
+    # one term of a linear expression, it must be followed by the sign of the next term or the end
+    TERM_PATTERN = re.compile(r"\s*(?P<op>[\-\+])?\s*(?P<a>\d*(\.\d*)?)\s*(?P<var>\w+)\s*(?=[\-\+]|\Z)")
+
+    @staticmethod
+    def scan(string: str):
+        """
+        Reads the linear expression `string` in a single pass and returns {variable: coefficient},
+        in the order the variables are written, terms of the same variable are summed.
+        """
+        match = _LinearParsing.TERM_PATTERN.match
+        terms = {}
+        pos, end = 0, len(string)
+        while True:
+            term = match(string, pos)
+            if not term:
+                raise NotValidObjectiveFunctionError(f"Right part of the objective function does not match: '{_LinearParsing._bad_term(string, pos)}'")
+            op, number, var = term.group('op', 'a', 'var')
+            try:
+                # default number is 1 when there isn't
+                coef = float(number) if number else 1.0
+            except ValueError:
+                raise NotValidObjectiveFunctionError(f"Right part of the objective function does not match: '{_LinearParsing._bad_term(string, pos)}'")
+            if op == '-':
+                coef = -coef
+            terms[var] = terms[var] + coef if var in terms else coef
+            pos = term.end()
+            if pos == end:
+                return terms
+
+    @staticmethod
+    def _bad_term(string, pos):
+        """The term starting at `pos`, for error messages"""
+        rest = string[pos:].strip()
+        signs = [ i for i in (rest.find('+', 1), rest.find('-', 1)) if i > 0 ]
+        return rest[:min(signs)].strip() if signs else rest
 
     @staticmethod
     def _str_linear(z, varnames):
@@ -106,12 +138,11 @@ class ObjectiveFunction:
 
     LEFT_PART_PATTERN  = re.compile(r"^\s*(?P<opt>min|max|minimize|maximize)\s+(?P<fname>\w+)\s*")
 
-    def __init__(self, string):
+    def __init__(self, string=None):
         self.string = string
 
         self._left_part = None
-
-        self._items = []
+        self._right_part = None
 
         self.z = []
         self.varnames = []
@@ -120,33 +151,47 @@ class ObjectiveFunction:
         self.optimize = None
         self.fname = None
 
-        self.parse()
+        if string is not None:
+            self.parse()
+
+    @classmethod
+    def from_terms(cls, optimize, fname, varnames, z):
+        """Builds an objective function from already parsed terms, without going through a string"""
+        objfunc = cls()
+        objfunc.optimize, objfunc.fname = optimize, fname
+        objfunc.varnames = list(varnames)
+        objfunc.z = [ float(c) for c in z ]
+        objfunc.var2ceof = {var: coef for var, coef in zip(objfunc.varnames, objfunc.z)}
+        objfunc.string = str(objfunc)
+        return objfunc
 
     def __str__(self):
         returned = f"{self.optimize} {self.fname} ="
         return returned + _LinearParsing._str_linear(self.z, self.varnames)
     
+    @timed("parse objective")
     def parse(self):
-        self._split_and_fill_items()
-        self._parse_left()
-        self._parse_right()
-        self._remove_redundant_vars()
+        key = _expression_key("objective", self.string)
+        parsed = PARSED.get(key)
+        if parsed is None:
+            self._split()
+            self._parse_left()
+            self._parse_right()
+            PARSED.put(key, (self.optimize, self.fname, tuple(self.varnames), tuple(self.z)))
+            return
+        self.optimize, self.fname, varnames, z = parsed
+        self.varnames, self.z = list(varnames), list(z)
+        self.var2ceof = dict(zip(varnames, z))
 
-    def _split_and_fill_items(self):
-        """Splits `self.string` and fill `self._items`"""
+    def _split(self):
+        """Splits `self.string` in its left and right parts"""
         try:
             left, right = self.string.split("=")
         except ValueError:
             raise NotValidObjectiveFunctionError("An OR objective function must constain one and only one equality `=` character")
 
         self._left_part = left
-
-        right = right.strip()
-        if '+' not in right and '-' not in right:
-            self._items.append(right)
-            return
-        
-        _LinearParsing.fill_items(right, self._items)       
+        self._right_part = right
             
     def _parse_left(self):
         match = ObjectiveFunction.LEFT_PART_PATTERN.fullmatch(self._left_part)
@@ -157,47 +202,65 @@ class ObjectiveFunction:
         self.fname = groupdict['fname']
 
     def _parse_right(self):
-        _LinearParsing.parse_linear(self._items, self.varnames, self.z)
-        self.var2ceof = {var: coef for var, coef in zip(self.varnames, self.z)}
-    
-    def _remove_redundant_vars(self):
-        _LinearParsing.remove_redundant_vars(self.varnames, self.z)
+        self.var2ceof = _LinearParsing.scan(self._right_part)
+        self.varnames = list(self.var2ceof)
+        self.z = list(self.var2ceof.values())
 
     
 
 class Constraint:
 
-    slacks_counter = 0
-    artificial_counter = 0
-
     SPLITTER_PATTERN = re.compile(r"(?P<op>=|<=|>=)")
 
     def __init__(self, string=None):
         self.string = string
 
-        self._items = []
-
         self.a = []
         self.slacks, self.artificial = None, None
         self.varnames = []
 
         self.op = None
         self.b = None
+        # -1 when `to_standard` multiplied the constraint by -1, so b_standard = sign * b_written
+        self.sign = 1
+        # written operator and number of written variables ( set by `to_standard` )
+        self.sense = None
+        self.structural = 0
 
         self._right_part = None
         self._left_part  = None
 
-        self.parse()
+        if string is not None:
+            self.parse()
+
+    @classmethod
+    def from_terms(cls, varnames, a, op, b):
+        """Builds a constraint from already parsed terms, without going through a string"""
+        constraint = cls()
+        constraint.varnames = list(varnames)
+        constraint.a = [ float(c) for c in a ]
+        constraint.op = op
+        constraint.b = float(b)
+        constraint.string = str(constraint)
+        constraint.to_standard()
+        return constraint
 
     def __str__(self):
         returned = _LinearParsing._str_linear(self.a, self.varnames)
         returned += f" {self.op} {self.b}"
         return returned.strip()
 
+    @timed("parse constraint")
     def parse(self):
-        self._split_and_fill_items()
-        self._parse_left()
-        self._remove_redundant_vars()
+        key = _expression_key("constraint", self.string)
+        parsed = PARSED.get(key)
+        if parsed is None:
+            self._split()
+            self._parse_left()
+            PARSED.put(key, (tuple(self.varnames), tuple(self.a), self.op, self.b))
+        else:
+            varnames, a, self.op, self.b = parsed
+            self.varnames, self.a = list(varnames), list(a)
         self.to_standard()
 
     def __repr__(self):
@@ -209,9 +272,12 @@ class Constraint:
         def multiply_by_negative_1():
             self.a = [ item * -1 for item in self.a ]
             self.b *= -1
+            self.sign = -1
+
+        # the constraint as written, before any slack or artificial variable is added
+        self.sense = self.op
+        self.structural = len(self.varnames)
 
-        if self.b == 0:
-            return
         if self.op == '=':
             if self.b < 0:
                 multiply_by_negative_1()
@@ -221,7 +287,7 @@ class Constraint:
             # index of artificial variable
             self.varnames.extend([self.artificial])
         elif self.op == '<=':
-            if self.b > 0:
+            if self.b >= 0:
                 # add e1
                 self.slacks = Constraint._gen_slacks(self.varnames)
                 self.a.extend([1.0])
@@ -249,7 +315,7 @@ class Constraint:
         # convert to numpy array
         self.a = np.array(self.a)
 
-    def _split_and_fill_items(self):
+    def _split(self):
         try:
             left, self.op, right = Constraint.SPLITTER_PATTERN.split(self.string)
         except ValueError:
@@ -263,52 +329,21 @@ class Constraint:
         except ValueError:
             raise NotValidConstraintError("Right part of a constraint isn't valid: " + right)
 
-        _LinearParsing.fill_items(self._left_part, self._items)
-
     def _parse_left(self):
-        _LinearParsing.parse_linear(self._items, self.varnames, self.a)
+        terms = _LinearParsing.scan(self._left_part)
+        self.varnames = list(terms)
+        self.a = list(terms.values())
 
-    def _remove_redundant_vars(self):
-        _LinearParsing.remove_redundant_vars(self.varnames, self.a)
+    @property
+    def matrix(self):
+        """The coefficients of this constraint as a one row sparse matrix"""
+        return CooMatrix.from_dense(self.a)
 
     def __add__(self, other):
-
-        # define some parameters when its either `Constraint` or `Constraints` instance.
-        if isinstance(other, Constraint):
-            new_b = [self.b] + [other.b]
-            other_numcols = 1
-            other_constraints = [other]
-        elif isinstance(other, Constraints):
-            new_b = [self.b] + other.b
-            other_numcols = len(other.a.T[0])
-            other_constraints = other.constraints
-        else:
+        if not isinstance(other, (Constraint, Constraints)):
             _type = type(other).__name__
             raise TypeError(f"Add (+) operation is not supported for `LP Constraint` and {_type}")
-
-        varnames = other.varnames
-        b = other.b
-        a = other.a
-
-        global_order = sorted(set(self.varnames) | set(varnames), key=sorter1)
-
-        self_var_val = { k: v for k, v in zip(self.varnames, self.a.T)}
-        other_var_val = { k: v for k, v in zip(varnames, a.T)}
-        
-        self_numcols = 1
-
-        target = np.zeros((self_numcols + other_numcols, len(global_order)))
-
-        for i, var in enumerate(global_order):
-            if var in self_var_val:
-                target.T[i, :self_numcols] = self_var_val[var] 
-            if var in other_var_val:
-                target.T[i, self_numcols:] = other_var_val[var]
-
-        new_constraints = [self] + other_constraints
-
-        return Constraints(global_order, new_constraints, target, new_b)
-
+        return _stack(self, other)
 
     @staticmethod
     def __gen_vars(varnames):
@@ -316,23 +351,15 @@ class Constraint:
 
     @staticmethod
     def _gen_slacks(varnames):
-        """Generates a slack variable name ( starts with 'e' )"""
-
-        slacks = list({'s', 'e'} - Constraint.__gen_vars(varnames))
-
-        var = slacks.pop()
-        Constraint.slacks_counter += 1
-        return f"{var}{Constraint.slacks_counter}"
+        """Generates a slack variable name ( starts with 's', or 'e' when a variable already does )"""
+        var = 'e' if 's' in Constraint.__gen_vars(varnames) else 's'
+        return f"{var}{_NAMING.get().slack()}"
 
     @staticmethod
     def _gen_artifical(varnames):
-        """Generates an artificial variable name ( starts with 'a' )"""
-
-        artificials = list({'A', 'a'} - Constraint.__gen_vars(varnames))
-        
-        var = artificials.pop()
-        Constraint.artificial_counter += 1
-        return f"{var}{Constraint.artificial_counter}"
+        """Generates an artificial variable name ( starts with 'A', or 'a' when a variable already does )"""
+        var = 'a' if 'A' in Constraint.__gen_vars(varnames) else 'A'
+        return f"{var}{_NAMING.get().artificial()}"
 
 
 
@@ -340,9 +367,12 @@ class Constraints:
 
     def __init__(self, vars, constraints, a, b):
         self.varnames = vars
+        # symbol id of every column ( see `symbols.SYMBOLS` )
+        self.ids = SYMBOLS.ids(vars)
 
         self.constraints = constraints
-        self.a = a
+        # coefficients are only stored sparse, `a` builds the dense matrix on demand
+        self.matrix = a if isinstance(a, CooMatrix) else CooMatrix.from_dense(a)
         self.b = b
 
         self.artificials = []
@@ -350,6 +380,66 @@ class Constraints:
 
         self._collect_artslack()
 
+    @classmethod
+    def from_iterable(cls, constraints):
+        """
+        Builds a `Constraints` from an iterable ( or a generator ) of `Constraint` objects or constraint strings
+        in a single pass, use this instead of chaining `c1 + c2 + ... + cN` on big models.
+        The slack and artificial variables of the parsed strings are numbered from 1 ( see `model_naming` ).
+        """
+        with model_naming():
+            return ConstraintsBuilder().extend(constraints).build()
+
+    @property
+    def a(self):
+        """Dense coefficient matrix, built from the sparse storage every time it is asked for"""
+        return self.matrix.toarray()
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def signs(self):
+        """Signs the constraints were multiplied by when brought to standard form"""
+        return [ c.sign for c in self.constraints ]
+
+    def slack_form(self):
+        """
+        Writes every constraint as `<=` with its own slack variable and no artificial variable,
+        `>=` rows are multiplied by -1 and `=` rows are split in both, so b can be negative.
+        Returns the variable names ( written variables first, sorted, then the slacks ), the sparse matrix,
+        b and the slack names ( one per row ).
+        """
+        terms, b = [], []
+        # columns without a coefficient in any row ( see `LinearProgramming` ) are kept
+        generated = { var for c in self.constraints for var in c.varnames[c.structural:] }
+        columns = [ var for var in self.varnames if var not in generated ]
+        for c in self.constraints:
+            written = { var: c.sign * coef for var, coef in zip(c.varnames[:c.structural], c.a[:c.structural]) }
+            rhs = c.sign * c.b
+            directions = {'<=': (1,), '>=': (-1,)}.get(c.sense, (1, -1))
+            for direction in directions:
+                terms.append({ var: direction * coef for var, coef in written.items() })
+                b.append(direction * rhs)
+
+        structural = SYMBOLS.ordered({ var for row in terms for var in row } | set(columns))
+        slacks = [ Constraint._gen_slacks(structural) for _ in terms ]
+        varnames = structural + slacks
+        index = {var: i for i, var in enumerate(varnames)}
+
+        rows, cols, vals = [], [], []
+        for i, row in enumerate(terms):
+            for var, coef in row.items():
+                rows.append(i)
+                cols.append(index[var])
+                vals.append(coef)
+            rows.append(i)
+            cols.append(index[slacks[i]])
+            vals.append(1.0)
+        matrix = CooMatrix(rows, cols, vals, (len(terms), len(varnames)))
+        return varnames, matrix, b, slacks
+
     def _collect_artslack(self):
         """Gets both slack and artificial variables from all constraints in this object."""
         for c in self.constraints:
@@ -368,49 +458,146 @@ class Constraints:
         return self.__str__()
 
     def __add__(self, other):
-
-        # define some parameters when its either `Constraint` or `Constraints` instance.
-        if isinstance(other, Constraint):
-            new_b = self.b + [other.b]
-            other_numcols = 1
-            other_constraints = [other]
-        elif isinstance(other, Constraints):
-            new_b = self.b + other.b
-            other_numcols = len(other.a.T[0])
-            other_constraints = other.constraints
-        else:
+        if not isinstance(other, (Constraint, Constraints)):
             _type = type(other).__name__
             raise TypeError(f"Add (+) operation is not supported for `LP Constraint` and {_type}")
-
-        varnames = other.varnames
-        b = other.b
-        a = other.a
-        try:
-            a.T
-        except AttributeError:
-            a = np.array(a)
-            
-        global_order = sorted(set(self.varnames) | set(varnames), key=sorter1)
-        self_var_val = { k: v for k, v in zip(self.varnames, self.a.T)}
-        other_var_val = { k: v for k, v in zip(varnames, a.T)}
-        
-        self_numcols = len(self.a.T[0])
-
-        target = np.zeros((self_numcols + other_numcols, len(global_order)))
-
-        for i, var in enumerate(global_order):
-            if var in self_var_val:
-                target.T[i, :self_numcols] = self_var_val[var]
-            else:
-                target.T[i, :self_numcols] = 0
-            
-            if var in other_var_val:
-                target.T[i, self_numcols:] = other_var_val[var]
-            else:
-                target.T[i, self_numcols:] = 0
-
-        return Constraints(global_order, self.constraints + other_constraints, target, new_b)
-
+        return _stack(self, other)
+
+
+class ConstraintsBuilder:
+    """
+    Collects constraint rows one at a time, with the symbol ids of their variables as columns,
+    the sparse matrix is assembled and its columns sorted only once in `build`.
+    """
+
+    def __init__(self):
+        # symbol ids of the variables of every row, also the ones with a zero coefficient
+        self._ids = []
+
+        # number of nonzero cells of every row, their column ( symbol id ) and value
+        self._counts = []
+        self._cols = []
+        self._vals = []
+
+        self.constraints = []
+        self.b = []
+        # every variable name of the rows added so far
+        self._names = set()
+
+    def __len__(self):
+        return len(self.constraints)
+
+    def add(self, constraint):
+        """Adds one `Constraint` ( or constraint string ) as the next row"""
+        if isinstance(constraint, str):
+            constraint = Constraint(constraint)
+        elif not isinstance(constraint, Constraint):
+            _type = type(constraint).__name__
+            raise TypeError(f"Can not build `LP Constraints` from {_type}")
+
+        constraint = _unique_names(constraint, self._names)
+        self._names.update(constraint.varnames)
+        ids = list(map(SYMBOLS.id, constraint.varnames))
+        count = len(self._cols)
+        for symbol, value in zip(ids, np.asarray(constraint.a, dtype=float).tolist()):
+            if value:
+                self._cols.append(symbol)
+                self._vals.append(value)
+        self._counts.append(len(self._cols) - count)
+        self._ids.extend(ids)
+
+        self.constraints.append(constraint)
+        self.b.append(constraint.b)
+        return self
+
+    def extend(self, constraints):
+        for constraint in constraints:
+            self.add(constraint)
+        return self
+
+    @timed("merge constraints")
+    def build(self):
+        """Sorts the variables once and assembles the `Constraints`"""
+        return self._assemble()
+
+    def _assemble(self):
+        if not self.constraints:
+            return Constraints([], [], CooMatrix([], [], [], (0, 0)), [])
+        global_order = SYMBOLS.sort(np.unique(self._ids))
+        rows = np.repeat(np.arange(len(self.constraints)), self._counts)
+        cols = _positions(global_order, np.array(self._cols, dtype=np.intp))
+        matrix = CooMatrix(rows, cols, self._vals, (len(self.constraints), len(global_order)))
+
+        return Constraints(SYMBOLS.lookup(global_order), list(self.constraints), matrix, list(self.b))
+
+
+def _positions(order, ids):
+    """Position of every one of `ids` in the id array `order`"""
+    by_id = np.argsort(order)
+    return by_id[np.searchsorted(order, ids, sorter=by_id)]
+
+
+def _ids(item):
+    """Symbol ids of the columns of either a `Constraint` or a `Constraints`"""
+    if isinstance(item, Constraint):
+        return SYMBOLS.ids(item.varnames)
+    return item.ids
+
+
+def _unique_names(constraint, taken):
+    """
+    Returns `constraint`, or a copy of it with the slack and artificial variables whose name is in `taken`
+    renamed, so rows generated in different `naming` blocks do not share a variable
+    """
+    generated = constraint.varnames[constraint.structural:]
+    if taken.isdisjoint(generated):
+        return constraint
+    renamed = copy.copy(constraint)
+    renamed.varnames = list(constraint.varnames)
+    names = _NAMING.get()
+    for j, var in enumerate(generated, constraint.structural):
+        if var not in taken:
+            continue
+        new = var
+        while new in taken or new in renamed.varnames:
+            number = names.slack() if var[0] in 'es' else names.artificial()
+            new = f"{var[0]}{number}"
+        renamed.varnames[j] = new
+        if renamed.slacks == var:
+            renamed.slacks = new
+        if renamed.artificial == var:
+            renamed.artificial = new
+    return renamed
+
+
+def _as_rows(item):
+    """Returns the constraints list and the b list of either a `Constraint` or a `Constraints`"""
+    if isinstance(item, Constraint):
+        return [item], [item.b]
+    return item.constraints, item.b
+
+
+@timed("merge constraints")
+def _stack(first, second):
+    """Stacks the rows of `second` under the rows of `first`, both are `Constraint` or `Constraints` instances"""
+    first_constraints, first_b = _as_rows(first)
+    second_constraints, second_b = _as_rows(second)
+
+    taken = set(first.varnames)
+    if any( not taken.isdisjoint(c.varnames[c.structural:]) for c in second_constraints ):
+        # generated names used twice, the builder renames them row by row
+        return ConstraintsBuilder().extend(first_constraints).extend(second_constraints)._assemble()
+
+    first_ids, second_ids = _ids(first), _ids(second)
+    global_order = SYMBOLS.sort(np.union1d(first_ids, second_ids))
+
+    matrices = [
+        item.matrix.remap(_positions(global_order, ids), len(global_order))
+        for item, ids in ((first, first_ids), (second, second_ids))
+    ]
+
+    return Constraints(SYMBOLS.lookup(global_order), first_constraints + second_constraints,
+                       CooMatrix.vstack(matrices, len(global_order)), first_b + second_b)
 
 
 if __name__ == "__main__":
@@ -1,40 +1,318 @@
+import copy
 import numpy as np
 import re
-from colorama import Fore, init
-from utils import get_all_occ, sorter1
-from linparse import ObjectiveFunction, Constraint, Constraints
+import time
+from linparse import ObjectiveFunction, Constraint, Constraints, model_naming
+from revised import RevisedSimplex, SingularBasisError
+from sparse import CooMatrix
+from symbols import SYMBOLS
+from presolve import run_presolve, InfeasibleError, UnboundedError
+from pricing import make_pricing
+from bounds import normalize, tighten, split_bounds, shift_lower
+from profiling import active, timed
+from sensitivity import analyze, row_factors
 
 
 """
 Calculate a formed linear programming problem using the simplex method
 
-## TODO
-    - Initial dual and final dual
-    - Sensitivity analysis
+The primal simplex runs in two phases, the dual simplex ( `calc(method="dual")` ) starts from the slack form
+of the constraints, and `resolve` carries on from the final basis with either of them.
 """
 
-init()
+# reduced costs and right-hand sides smaller than this count as 0 in the warm start iterations
+EPSILON = 1e-9
+# the same for a float32 tableau, relative to the largest right-hand side ( or cost for Cj-Zj )
+FLOAT32_EPSILON = 1e-5
 
-WHITE = Fore.WHITE
-PIVOT_COLUMN_COLOR = Fore.CYAN
-PIVOT_ROW_COLOR = Fore.YELLOW
-PIVOT_COLOR = Fore.RED
-Z_COLOR = Fore.GREEN
+# cells of the block of rows `pivot_tableau` updates at once ( 2 MB of float64 )
+PIVOT_BLOCK_CELLS = 1 << 18
+
+# degenerate pivots in a row ( z does not move ) after which Bland's rule takes over, until z moves again
+STALL_PIVOTS = 10
+
+# solve status, see `LinearProgramming.status`
+OPTIMAL = "optimal"
+INFEASIBLE = "infeasible"
+UNBOUNDED = "unbounded"
+ITERATION_LIMIT = "iteration_limit"
+TIME_LIMIT = "time_limit"
 
 class NotSolutionError(Exception):
-    def __init__(self, message):
+    def __init__(self, message, status=None):
+        self.message = message
+        # why there is no solution, one of the solve statuses
+        self.status = status
+
+
+class SolveResult:
+    """What a solve ended with, returned by `silent_calc` instead of printing it"""
+
+    def __init__(self, status, z, varnames, values, basis, iterations, message=None):
+        # one of OPTIMAL, INFEASIBLE, UNBOUNDED, ITERATION_LIMIT or TIME_LIMIT
+        self.status = status
+        # objective value, including the variables fixed by presolve
+        self.z = z
+        # variables of the problem as it was written and their values, in the same order
+        self.varnames = varnames
+        self.values = values
+        # column of the basic variable of every row
+        self.basis = basis
+        # pivots done
+        self.iterations = iterations
+        # why the solve did not end OPTIMAL, None when it did
         self.message = message
 
+    @property
+    def success(self):
+        return self.status == OPTIMAL
+
+    def as_dict(self):
+        """{variable: value}"""
+        return dict(zip(self.varnames, self.values.tolist()))
+
+
+def pivot_work(tableau):
+    """Work buffers of `pivot_tableau` for `tableau`: a copy of the pivot row, of the pivot column, and a block of rows"""
+    rows, columns = tableau.shape
+    block = max(1, min(rows, PIVOT_BLOCK_CELLS // columns))
+    return (np.empty(columns, dtype=tableau.dtype), np.empty(rows, dtype=tableau.dtype),
+            np.empty((block, columns), dtype=tableau.dtype))
+
+
+def pivot_tableau(tableau, pivrow, pivcol, work=None):
+    """
+    Pivots `tableau` in place on the cell (`pivrow`, `pivcol`).
+    The row and column elimination is a rank-1 update of the whole tableau, each cell becomes
+    x = x - (a*b) / pivot like the simplex rule does it by hand. It is done a block of rows at a time
+    in the `work` buffers ( see `pivot_work` ), so no temporary of the size of the tableau is made.
+    """
+    pivot_row, pivot_column, block = pivot_work(tableau) if work is None else work
+    pivot = tableau[pivrow, pivcol]
+    np.copyto(pivot_row, tableau[pivrow])
+    np.copyto(pivot_column, tableau[:, pivcol])
+
+    for start in range(0, len(tableau), len(block)):
+        rows = tableau[start:start + len(block)]
+        product = block[:len(rows)]
+        np.multiply(pivot_column[start:start + len(rows), None], pivot_row, out=product)
+        product /= pivot
+        rows -= product
+    # pivot row calculation
+    np.divide(pivot_row, pivot, out=tableau[pivrow])
+    # pivot column calculation
+    tableau[:, pivcol] = 0
+    # set pivot to 1
+    tableau[pivrow, pivcol] = 1
+    return tableau
+
+
+class Tableau:
+    """
+    Dense simplex tableau, `A` and `b` are views of one (m, n + 1) array allocated once,
+    every pivot rewrites it in place. `dtype="float32"` halves its memory, at the cost of precision.
+    """
+
+    def __init__(self, A, b, dtype="float64"):
+        # the only place a dense copy of a sparse constraint matrix gets built
+        if isinstance(A, CooMatrix):
+            A = A.toarray()
+        A = np.asarray(A)
+        tableau = np.empty((A.shape[0], A.shape[1] + 1), dtype=dtype)
+        tableau[:, :-1] = A
+        tableau[:, -1] = b
+        self._setup(tableau)
+
+    @classmethod
+    def from_tableau(cls, tableau):
+        """A `Tableau` working in place in `tableau` ( A with b as its last column ), it is not copied"""
+        engine = cls.__new__(cls)
+        engine._setup(tableau)
+        return engine
+
+    def _setup(self, tableau):
+        self._tableau = tableau
+        self.dtype = tableau.dtype
+        self._work = pivot_work(tableau)
+        # Cj-Zj and one row times its cb, see `reduced_costs`
+        self._reduced = np.empty(tableau.shape[1] - 1, dtype=self.dtype)
+        self._product = np.empty(tableau.shape[1] - 1, dtype=self.dtype)
+        self._views()
+
+    def _views(self):
+        self.A = self._tableau[:, :-1]
+        self.b = self._tableau[:, -1]
+
+    def column(self, j):
+        return self.A.T[j]
+
+    def reduced_costs(self, cb, c):
+        """Calculates Cj-Zj, in a buffer rewritten on the next call"""
+        # row by row, so every column sums in the same order ( and to the same bits ) as a plain loop would
+        n = self.A.shape[1]
+        total, product = self._reduced[:n], self._product[:n]
+        total[:] = 0
+        for irow in range(len(cb)):
+            np.multiply(self.A[irow], cb[irow], out=product)
+            total -= product
+        total += np.asarray(c, dtype=float)
+        return total
+
+    def row(self, i):
+        return self.A[i]
+
+    def combine_rows(self, weights):
+        """Returns `weights` @ the tableau"""
+        return np.asarray(weights, dtype=float) @ self.A
+
+    def combine_columns(self, weights):
+        """Returns the tableau @ `weights`"""
+        return self.A @ np.asarray(weights, dtype=float)
+
+    def row_sums(self, rows):
+        # `cumsum` adds left to right like `sum` does, `np.sum` would add pairwise
+        return np.cumsum(self.A[rows], axis=1)[:, -1]
+
+    def set_basis(self, columns):
+        """Brings the starting tableau to the basis made of `columns` ( one per row )"""
+        B = self.A[:, columns]
+        self._tableau[:] = np.linalg.solve(B, self._tableau)
+        # exact unit columns for the basic variables
+        self.A[:, columns] = np.eye(len(columns))
+
+    def pivot(self, pivrow, pivcol):
+        # b is the last column, the whole tableau is pivoted at once
+        pivot_tableau(self._tableau, pivrow, pivcol, self._work)
+
+    def drop_columns(self, count):
+        """Drops the last `count` columns from the tableau, b moves next to the ones left ( no copy of `A` )"""
+        n = self.A.shape[1] - count
+        self._tableau[:, n] = self.b
+        self._tableau = self._tableau[:, :n + 1]
+        row, column, block = self._work
+        self._work = (row[:n + 1], column, block[:, :n + 1])
+        self._views()
+
+
+def ratio_test(column, b, out=None, epsilon=0.0, pivot_epsilon=0.0):
+    """
+    θ = b / column for every row ( `column` can also be a matrix, one column per candidate ),
+    inf where the column is 0, negative with b >= 0, or where θ would be negative.
+    b closer to 0 than `epsilon` and cells closer to 0 than `pivot_epsilon` ( rounding noise ) count as 0,
+    so there is no pivot on noise.
+    θ is written to `out` when it is given.
+    """
+    column = np.asarray(column, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if epsilon and (b < 0).any():
+        b = np.where(np.abs(b) < epsilon, 0.0, b)
+    if column.ndim == 2:
+        b = b[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.divide(b, column, out=out)
+    ratio[(np.abs(column) <= pivot_epsilon) | ((column < 0) & (b >= 0)) | (ratio < 0)] = np.inf
+    return ratio
+
+
+def _argmin(values):
+    """
+    Index of the value the builtin `min` would return: the first smallest one,
+    NaN values are skipped unless the first value is one ( then it wins )
+    """
+    values = np.asarray(values, dtype=float)
+    if np.isnan(values[0]):
+        return 0
+    return int(np.argmin(np.where(np.isnan(values), np.inf, values)))
+
+
+# available simplex engines, selected with `LinearProgramming.calc(engine=...)`
+ENGINES = {
+    "tableau": Tableau,
+    "revised": RevisedSimplex,
+}
+
 
 class LinearProgramming:
 
-    def __init__(self, objfunc, constraints):
+    # the slack and artificial variables of the rows presolve and the bounds build are numbered from 1
+    @model_naming()
+    def __init__(self, objfunc, constraints, presolve=False, pricing="dantzig", max_iterations=None, time_limit=None,
+                 bounds=None, detect_bounds=False):
+
+        # reductions done by `presolve.run_presolve`, None when the problem is solved as written
+        self.postsolve = None
+        # (status, message) when presolve already proved there is no optimum, a solve ends with it right away
+        self._presolve_status = None
+        if presolve:
+            try:
+                objfunc, constraints, self.postsolve = run_presolve(objfunc, constraints)
+            except InfeasibleError as e:
+                self._presolve_status = INFEASIBLE, e.message
+            except UnboundedError as e:
+                self._presolve_status = UNBOUNDED, e.message
+
+        # {var: (lower, upper)} solved by the bounded simplex instead of as rows, from `bounds`
+        # and ( with `detect_bounds` ) from the single variable rows of the constraints
+        self.bounds = {}
+        if detect_bounds:
+            constraints, self.bounds = split_bounds(constraints)
+        if bounds:
+            self.bounds = tighten(self.bounds, normalize(bounds))
+        for var in self.bounds:
+            if var not in constraints.varnames:
+                raise ValueError(f"Bounded variable '{var}' is in no constraint")
+        # every variable is shifted by its lower bound, z of the shifted problem is off by this much
+        self._bound_offset = 0.0
+        lower = { var: bound[0] for var, bound in self.bounds.items() if bound[0] != 0 }
+        if lower:
+            constraints = shift_lower(constraints, lower)
+            costs = dict(zip(objfunc.varnames, objfunc.z))
+            self._bound_offset = sum( costs.get(var, 0.0) * value for var, value in lower.items() )
+        # upper bound of every column of the shifted problem and the nonbasic ones at it, set by `init_bounded`
+        self._upper = None
+        self._at_upper = None
+
+        # a variable of the objective function only is a zero column, nothing keeps it from growing
+        missing = set(objfunc.varnames) - set(constraints.varnames)
+        if missing:
+            varnames = SYMBOLS.ordered(set(constraints.varnames) | missing)
+            columns = [ varnames.index(var) for var in constraints.varnames ]
+            constraints = Constraints(varnames, constraints.constraints,
+                                      constraints.matrix.remap(columns, len(varnames)), constraints.b)
 
         self.constraints = constraints
         self.objfunc = objfunc
 
-        self.A = self.constraints.a
-        self.b = self.constraints.b
+        # simplex engine holding the current A and b, created by `init_mat`
+        self._engine = None
+        # constraint matrix the engine started from ( standard or slack form )
+        self._matrix = None
+        self._engine_name = "tableau"
+        self._engine_options = {}
+        # entering column rule, a name of `pricing.PRICING_RULES` or a rule instance
+        self._pricing = make_pricing(pricing)
+
+        # a solve stops with the status ITERATION_LIMIT / TIME_LIMIT after this many pivots / seconds
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        # OPTIMAL, INFEASIBLE, UNBOUNDED, ITERATION_LIMIT or TIME_LIMIT once a solve ended, None before
+        self.status = None
+        # why the last solve did not end OPTIMAL, None when it did
+        self.message = None
+        # pivots done and start time of the current solve, degenerate pivots in a row
+        self._pivots = 0
+        self._started = None
+        self._stalled = 0
+        # `profiling.Profile` recording the current solve, None when profiling is off
+        self._profile = None
+        # EPSILON for the right-hand sides and for Cj-Zj of the current solve, see `_start_solve`
+        self._epsilon = EPSILON
+        self._cost_epsilon = EPSILON
+        # smallest cell of the pivot column the ratio test pivots on
+        self._pivot_epsilon = EPSILON
+
+        # standard form right-hand sides the problem is currently solved for ( see `resolve` )
+        self._rhs = list(self.constraints.b)
 
         self.varnames = None
         self._get_vars()
@@ -48,20 +326,22 @@ class LinearProgramming:
         self._set_optimize(max) if self.objfunc.optimize == "max" else self._set_optimize(min)
 
         # number of constraints
-        self.conlen = len(self.A)
+        self.conlen = len(self.constraints.b)
 
         # Basic variables
         self.vbs = [[0]*self.conlen, [0]*self.conlen]
+        # column of every basic variable ( -1 until known ), `vbs` keeps their names to show them
+        self._basis = np.full(self.conlen, -1)
+        # column basic in every row of the engine, the solution is read from it ( `_basis` follows `vbs` )
+        self._engine_basis = np.full(self.conlen, -1)
 
         # constant Cj
-        self.cj = [self.varnames, self.objfunc.z + [0] * (len(self.varnames) - len(self.objfunc.z))]
+        costs = dict(zip(self.objfunc.varnames, self.objfunc.z))
+        self.cj = [self.varnames, [ costs.get(var, 0) for var in self.varnames ]]
 
         # constant cjdict
         self.cjdict = {var: coef for var, coef in zip(self.cj[0], self.cj[1])}
 
-        # working cjdict
-        self._cjdict = None
-
         # working cj
         self._cj = None
 
@@ -71,8 +351,12 @@ class LinearProgramming:
         # if there is artificial variables
         self.phase = 0
 
-        # Ratio column (θ)
+        # "primal" ( two-phase ) or "dual" simplex, see `calc`
+        self.method = "primal"
+
+        # Ratio column (θ), written in place in `_ratio_buffer`
         self._ratio_column = None
+        self._ratio_buffer = None
 
         # pivot infos
         self._pivcol = None
@@ -82,29 +366,50 @@ class LinearProgramming:
         # number of iterations
         self.iterations = 0
 
+    @property
+    def A(self):
+        if self._engine is None:
+            return self.constraints.a
+        return self._engine.A
+
+    @property
+    def b(self):
+        if self._engine is None:
+            return self.constraints.b
+        return self._engine.b
+
     def _set_optimize(self, opt):
         self._opt = self.opt
         self.opt = opt
         self.is_not_optimized = self.is_not_maximized if opt is max else self.is_not_minimized
 
     def _detect_basic_vars(self):
-        for i, column in enumerate(self.A.T):
-            if 1 in column and np.count_nonzero(column) == 1:
-                pos = np.where(column)[0][0]
-                basicvar = self.varnames[i]
-                self.vbs[0][pos] = basicvar
-                self.vbs[1][pos] = self._cjdict[basicvar]
+        for i, pos in self.constraints.matrix.unit_columns():
+            self._basis[pos] = i
+            self.vbs[0][pos] = self.varnames[i]
+            self.vbs[1][pos] = self._cj[1][i]
 
     def _get_vars(self):
         """Generates all basic and non-basic variables from both the objective function and constraints."""
-        self.varnames = sorted(list(set(self.constraints.varnames) | set(self.objfunc.varnames)), key=sorter1)
+        self.varnames = SYMBOLS.ordered(set(self.constraints.varnames) | set(self.objfunc.varnames))
 
     def is_2phase_method(self):
         """Checks if there is a two-phase method"""
         return self.constraints.artificials
         
-    def init_mat(self):
-        """Initialize start-up tableau"""
+    @timed("init")
+    def init_mat(self, engine="tableau", **options):
+        """
+        Initialize start-up tableau
+        `engine` is one of `ENGINES`, `options` are passed to it ( e.g. `refactor_every` for "revised" )
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown simplex engine '{engine}', expected one of {list(ENGINES)}")
+        self._engine = ENGINES[engine](self.constraints.matrix, self.constraints.b, **options)
+        self._matrix = self.constraints.matrix
+        self._engine_name, self._engine_options = engine, options
+        self._pricing.reset(self._engine)
+        self._start_solve()
 
         # Basic variables
         if self.is_2phase_method():
@@ -117,225 +422,293 @@ class LinearProgramming:
         else:
             # make copy of original cj
             self._cj = [self.cj[0].copy(), self.cj[1].copy()]
-        
-        self._cjdict = {var: coef for var, coef in zip(self._cj[0], self._cj[1])}
+
         # detect initial basic variables and fill vbs
         self._detect_basic_vars()
+        self._engine_basis = self._basis.copy()
 
-        self.A = np.array(self.A)
-        
         self._get_pivot()
         self._calc_z()
+        if self._profile is not None:
+            self._profile.start_laps()
+
+    def _start_solve(self):
+        self.status, self.message = None, None
+        self._pivots, self._stalled = 0, 0
+        self._started = time.perf_counter()
+        self._epsilon, self._cost_epsilon, self._pivot_epsilon = EPSILON, EPSILON, EPSILON
+        if getattr(self._engine, "dtype", None) == np.float32:
+            self._epsilon = FLOAT32_EPSILON * max(1.0, float(np.abs(self.b).max(initial=0)))
+            # phase 1 costs are 0 and -1, so 1 covers both phases
+            self._cost_epsilon = FLOAT32_EPSILON * max(1.0, float(np.abs(self.cj[1]).max(initial=0)))
+            self._pivot_epsilon = FLOAT32_EPSILON
+        self._profile = active()
+        if self._profile is not None:
+            self._profile.start_laps()
 
     def _calc_z(self):
         total = 0
-        for cj, b in zip(self.vbs[1], self.b):
-            total += cj * b
+        costs = self._cj[1]
+        for j, b in zip(self._engine_basis, self._basic_values()):
+            # an artificial variable left at 0 in a redundant row ( see `_drive_out_artificials` ) has no cost
+            total += (costs[j] if j < len(costs) else 0) * b
+        if self._upper is not None:
+            total += np.asarray(self._cj[1], dtype=float)[self._at_upper] @ self._upper[self._at_upper]
+            if self.phase != 1:
+                total += self._bound_offset
         self.z = total
+
+    def _basic_values(self):
+        """Values of the basic variables, `b` unless nonbasic variables sit at their upper bound"""
+        if self._upper is None or not self._at_upper.any():
+            return self.b
+        return np.asarray(self.b) - self._engine.combine_columns(np.where(self._at_upper, self._upper, 0))
     
     def _cj_zj(self):
         """Calculates Cj-Zj"""
-        final = []
-        for icolumn, column in enumerate(self.A.T):
-            total = 0
-            for irow, cell in enumerate(column):
-                total -= self.vbs[1][irow] * cell
-            total += self._cj[1][icolumn]
-            final.append(total)
-        self.cj_zj = final
+        self.cj_zj = self._engine.reduced_costs(self.vbs[1], self._cj[1])
 
     def _get_pivot_column(self):
         self._cj_zj()
         # get all index occurences of optimum of cj-zj row
-        optimum = self.opt(self.cj_zj)
-        all_occ = get_all_occ(self.cj_zj, optimum)
+        cj_zj = np.asarray(self.cj_zj, dtype=float)
+        improving = self._improvable(cj_zj)
+        if self._stalled >= STALL_PIVOTS and improving.any():
+            # Bland's rule can not cycle: the first improving column
+            self._pivcol = int(np.flatnonzero(improving)[0])
+            self._pivot_column = self._engine.column(self._pivcol)
+            return
+        scores = self._pricing.scores(cj_zj, improving)
+        optimum = scores[_argmin(-scores if self.opt is max else scores)]
+        all_occ = np.flatnonzero(scores == optimum)
         # if only one optimum, than just choose it
-        if len(all_occ) == 1 or self.cj_zj[all_occ[0]] == 0:
-            self._pivcol = all_occ[0]
-            self._pivot_column = self.A.T[self._pivcol]
+        if len(all_occ) == 1 or scores[all_occ[0]] == 0:
+            self._pivcol = int(all_occ[0])
         else:
-            # 2 or more cj-zj's have the same value
-            all_cands = []
-            for candidate in all_occ:
-                self._pivot_column = self.A.T[candidate]
-                all_cands.append((candidate, min(self._get_ratio_column())))
-
-            self._pivcol = min(all_cands, key=lambda k: k[1])[0]
-            self._pivot_column = self.A.T[self._pivcol]
+            # 2 or more cj-zj's have the same value: the one with the smallest ratio, the first one on ties
+            columns = np.column_stack([ self._engine.column(candidate) for candidate in all_occ ])
+            ratios = ratio_test(columns, self.b)
+            minimums = np.where(np.isnan(ratios[0]), np.nan, np.where(np.isnan(ratios), np.inf, ratios).min(axis=0))
+            self._pivcol = int(all_occ[_argmin(minimums)])
+        self._pivot_column = self._engine.column(self._pivcol)
 
     def _get_ratio_column(self):
-        self._ratio_column = []
-        for pivot_cell, b_cell in zip(self._pivot_column, self.b):
-            if pivot_cell == 0 or (pivot_cell < 0 and b_cell >= 0):
-                self._ratio_column.append(np.inf)
-                continue
-            target = b_cell / pivot_cell
-            if target < 0:
-                self._ratio_column.append(np.inf)
-            else:
-                self._ratio_column.append(target)
+        if self._ratio_buffer is None or len(self._ratio_buffer) != len(self.b):
+            self._ratio_buffer = np.empty(len(self.b))
+        self._ratio_column = ratio_test(self._pivot_column, self.b, out=self._ratio_buffer, epsilon=self._epsilon,
+                                        pivot_epsilon=self._pivot_epsilon)
         return self._ratio_column
 
     def _get_pivot_row(self):
         self._get_ratio_column()
         # get all index occurences of minimum of ratio column
-        minimum = min(self._ratio_column)
-        all_occ = get_all_occ(self._ratio_column, minimum)
+        minimum = self._ratio_column[_argmin(self._ratio_column)]
+        all_occ = np.flatnonzero(self._ratio_column == minimum)
         if len(all_occ) == 1:
-            self._pivrow = all_occ[0]
+            self._pivrow = int(all_occ[0])
+            return
+        if self._profile is not None:
+            self._profile.count("ratio ties")
+        if self._stalled >= STALL_PIVOTS:
+            # Bland's rule: the row of the basic variable with the smallest column
+            self._pivrow = int(all_occ[np.argmin(self._engine_basis[all_occ])])
         else:
-            # 2 or more ratios have the same value
-            target_rows = [ self.A[index] for index in all_occ ]
-            row_sums = [ sum(row) for row in target_rows ]
-            min_row_sum = row_sums.index(min(row_sums))
-            self._pivrow = all_occ[min_row_sum]
-                 
+            # 2 or more ratios have the same value: the smallest row sum, the first one on ties
+            row_sums = np.asarray(self._engine.row_sums(all_occ))
+            self._pivrow = int(all_occ[_argmin(row_sums)])
+
     def _get_pivot(self):
         """Finding the pivot"""
-        self._get_pivot_column()
-        self._get_pivot_row()
-        self._pivot = self.A[self._pivrow, self._pivcol]
+        if self._profile is None:
+            self._get_pivot_column()
+            self._get_pivot_row()
+        else:
+            start = time.perf_counter()
+            self._get_pivot_column()
+            middle = time.perf_counter()
+            self._get_pivot_row()
+            self._profile.add_time("pricing", middle - start)
+            self._profile.add_time("ratio test", time.perf_counter() - middle)
+        self._pivot = self._pivot_column[self._pivrow]
+
+    def _pivot_engine(self):
+        """Pivots the engine on the current pivot, the pricing rule updates its weights from the tableau before it"""
+        degenerate = abs(self.b[self._pivrow]) < self._epsilon
+        self._stalled = self._stalled + 1 if degenerate else 0
+        if self._profile is not None:
+            return self._profiled_pivot(degenerate)
+        self._pricing.update(self._engine, self._pivrow, self._pivcol, self._pivot_column)
+        self._engine.pivot(self._pivrow, self._pivcol)
+        self._engine_basis[self._pivrow] = self._pivcol
+        self._pivots += 1
+
+    def _profiled_pivot(self, degenerate):
+        """`_pivot_engine` recording the pivot in the active profile, the lap since the last pivot goes to its phase"""
+        profile = self._profile
+        start = time.perf_counter()
+        self._pricing.update(self._engine, self._pivrow, self._pivcol, self._pivot_column)
+        middle = time.perf_counter()
+        self._engine.pivot(self._pivrow, self._pivcol)
+        self._engine_basis[self._pivrow] = self._pivcol
+        self._pivots += 1
+        profile.add_time("pricing update", middle - start)
+        profile.add_time("pivot", time.perf_counter() - middle)
+
+        phase = "phase 1" if self.phase == 1 else "phase 2"
+        seconds = profile.lap()
+        profile.add_time(phase, seconds)
+        profile.count("pivots")
+        profile.count("degenerate pivots", int(degenerate))
+        rows, columns = self.conlen, len(self._cj[1])
+        profile.counters["tableau cells"] = max(profile.counters.get("tableau cells", 0), rows * columns)
+        profile.record_iteration(pivot=self._pivots, phase=phase, seconds=seconds, degenerate=bool(degenerate),
+                                 row=self._pivrow, column=self._pivcol, rows=rows, columns=columns)
 
     def _update_vbs(self):
         """Updates the basic variables after finding the pivot"""
+        self._basis[self._pivrow] = self._pivcol
         self.vbs[1][self._pivrow] = self._cj[1][self._pivcol]
         self.vbs[0][self._pivrow] = self._cj[0][self._pivcol]
 
     def show_current(self):
         """Shows current simplex tableau"""
-        # cj
-        print(f"==========={'MAXIMIZATION' if self.opt is max else 'MINIMIZATION'}===========")
-        phase = "" if self.phase == 0 else f" PHASE {self.phase} "
-        print("-"*45 + f" Iteration {self.iterations:<3}{phase}" + "-"*45)
-        print("   {}{:6}".format(WHITE, "Cj"), end='')
-        print("    ", end='')
-        for item in self._cj[1]:
-            print(f"{WHITE}{item:7.2f}{WHITE}", end='  ')
-        print("    " + 8*" " + " ")
-        # -------------------------
-        print(" "*9 + "VB", end='      ')
-        for var in self.varnames:
-            print(f"{var:6}", end='   ')
-        print("b        θ")
-        # -------------------------
-        for vb_vars, vb_values, row, b, ratio in zip(self.vbs[0], self.vbs[1], enumerate(self.A), self.b, self._ratio_column):
-            irow, row = row
-            print(f"{WHITE}{vb_values:7.2f}{WHITE}", end='  ')
-            print(f"{WHITE}{vb_vars:2}{WHITE}", end='  ')
-            for icolumn, cell in enumerate(row):
-                color = PIVOT_ROW_COLOR if irow == self._pivrow else WHITE
-                if icolumn == self._pivcol:
-                    if color == PIVOT_ROW_COLOR:
-                        color = PIVOT_COLOR
-                    else:
-                        color = PIVOT_COLUMN_COLOR
-                print(f"{color}{cell:7.2f}{WHITE}", end='  ')
-            print(f"{color}{b:7.2f}{WHITE}", end='  ')
-            print(f"{ratio:7.2f}")
-        # cj-zj
-        print("   {}{:6}".format(WHITE, "Cj-Zj"), end='    ')
-        for item in self.cj_zj:
-            print(f"{item:7.2f}", end='  ')
-        print(f"{Z_COLOR}{self.z:7.2f}{WHITE}")
-
-    def _update_b(self):
-        b = self.b[self._pivrow]
-        for irow, cell in enumerate(self.b):
-            # x = x - (a*b) / pivot
-            a = self.A[irow, self._pivcol]
-            self.b[irow] = self.b[irow] - a*b / self._pivot
-        self.b[self._pivrow] = b / self._pivot
+        from render import show_tableau
+        show_tableau(self)
 
     def next_iter(self):
         """Calculates the next simplex iterations"""
         self.iterations += 1
 
-        # define new A
-        next_A = self.A.copy()
-
-        # pivot row calculation
-        next_A[self._pivrow] /= self._pivot
-        # pivot column calculation
-        next_A[:, self._pivcol] = 0
-        # set pivot to 1
-        next_A[self._pivrow, self._pivcol] = 1
-
-        for irow, row in enumerate(self.A):
-            a = self.A[irow, self._pivcol]
-            for icolumn, column in enumerate(row):
-                if irow == self._pivrow and icolumn == self._pivcol:
-                    continue
-                elif irow == self._pivrow:
-                    continue
-                elif icolumn == self._pivcol:
-                    continue
-                else:
-                    # x = x - (a*b) / pivot
-                    b = self.A[self._pivrow, icolumn]
-                    next_A[irow, icolumn] = self.A[irow, icolumn] - ( ( a * b ) / self._pivot )
-
-        self._update_b()
-
-        self.A = next_A
+        self._pivot_engine()
+
+        # the entering variable is basic in the pivot row from now on, before Cj-Zj is priced with it
+        self._update_vbs()
 
         # search for next pivot
         self._get_pivot()
 
-        # update basic variables
-        self._update_vbs()
-
         # calculate z
         self._calc_z()
 
     def is_not_maximized(self):
         for item in self.cj_zj:
-            if item > 0:
+            if item > self._cost_epsilon:
                 return True
 
     def is_not_minimized(self):
         for item in self.cj_zj:
-            if item < 0:
+            if item < -self._cost_epsilon:
                 return True
 
     def print_result(self):
         """Prints the final result ( not very beautiful )"""
-        if self.is_not_optimized():
+        if self.status != OPTIMAL and self.is_not_optimized():
             raise NotSolutionError("Solution not reached yet.")
-        else:
-            print("-"*25, "RESULT", "-"*25, sep="-")
-            for vb, value in zip(self.vbs[0], self.b):
-                print(" "*20, vb, "=", f"{value:10.3f}", " "*20, end=' |\n')
-            print(" "*20, f"{self.objfunc.fname} ", "=", f"{self.z:10.3f}", " "*20, end=' |\n')
-
-    def calc(self, verbose=True, init=True, show_first=True, show_result=True):
+        from render import show_result
+        show_result(self)
+
+    def objective_value(self):
+        """Value of the objective function, including the variables fixed by presolve"""
+        if self.postsolve is None:
+            return self.z
+        return self.z + self.postsolve.offset
+
+    def values(self):
+        """Returns {variable: value} of every variable of the problem as it was written"""
+        written = self._written_vars()
+        values = { var: 0.0 for var in self.varnames if var in written }
+        for j, value in zip(self._engine_basis, self._basic_values()):
+            # an artificial variable left in a redundant row is not a column any more in phase 2
+            if j < len(self.varnames) and self.varnames[j] in values:
+                values[self.varnames[j]] = float(value)
+        if self._upper is not None:
+            values.update({ self.varnames[j]: float(self._upper[j]) for j in np.flatnonzero(self._at_upper) })
+            for var, (lower, _) in self.bounds.items():
+                values[var] += lower
+        if self.postsolve is not None:
+            values = self.postsolve.apply(values)
+        return values
+
+    def calc(self, verbose=True, init=True, show_first=True, show_result=True, engine="tableau", method="primal", **options):
         # this is basically the main function
+        self._solve(verbose, init, show_first, engine, method, options)
+        if self.status != OPTIMAL:
+            print(self.message)
+        elif show_result:
+            self.print_result()
+
+    def silent_calc(self, engine="tableau", method="primal", **options):
+        """Solves the problem without showing anything and returns a `SolveResult`"""
+        self._solve(False, True, False, engine, method, options)
+        return self.result()
+
+    def result(self):
+        """`SolveResult` of the last solve"""
+        values = self.values()
+        return SolveResult(self.status, self.objective_value(), list(values), np.fromiter(values.values(), dtype=float),
+                           self._engine_basis.copy(), self._pivots, self.message)
+
+    @timed("solve")
+    def _solve(self, verbose, init, show_first, engine, method, options):
+        """Runs the simplex until it ends, `status` and `message` tell how, only the tableaus are shown ( `verbose` )"""
+        if self._presolve_status is not None:
+            # the problem as written is set up only to report a result
+            if init and self.bounds:
+                self.init_bounded(engine, **options)
+            elif init:
+                self.init_mat(engine, **options)
+            self.status, self.message = self._presolve_status
+            return
+        if self.bounds:
+            return self._calc_bounded(verbose, init, show_first, engine, method, options)
+        if init and self._use_dual(method, engine, options):
+            return self._calc_dual(verbose, show_first)
         if init:
-            self.init_mat()
+            self.init_mat(engine, **options)
         if verbose and show_first:
             self.show_current()
+        self._primal_iterations(verbose)
+
+    def _primal_iterations(self, verbose):
         while self.is_not_optimized():
+            if self._stopped():
+                return
             self.next_iter()
             if verbose:
                 self.show_current()
-
         if self.phase == 1:
-            if not self._calc_two_phase():
-                return
-        if show_result:
-            self.print_result()
-
-    def silent_calc(self):
-        self.init_mat()
-        while self.is_not_optimized():
-            self.next_iter()
-        if self.phase == 1:
-            if not self._calc_two_phase():
-                return
-
+            self._calc_two_phase(verbose)
+        else:
+            self.status = OPTIMAL
 
-    def _calc_two_phase(self):
-        if self.z != 0:
-            print("There is no solution for this problem.")
+    def _stopped(self):
+        """Checks the pivot found for the next iteration and the limits, sets `status` if the solve has to stop before it"""
+        if self._ratio_column[self._pivrow] == np.inf:
+            self.status, self.message = UNBOUNDED, "The problem is unbounded."
+            return True
+        reached = self._limit_reached()
+        if reached is None:
+            return False
+        self.status, self.message = reached
+        return True
+
+    def _limit_reached(self):
+        """(status, message) when the iteration or time limit is reached, None otherwise"""
+        if self._started is None:
+            # carrying on from a snapshot
+            self._started = time.perf_counter()
+        if self.max_iterations is not None and self._pivots >= self.max_iterations:
+            return ITERATION_LIMIT, f"Stopped after {self._pivots} iterations, the iteration limit is reached."
+        elapsed = time.perf_counter() - self._started
+        if self.time_limit is not None and elapsed >= self.time_limit:
+            return TIME_LIMIT, f"Stopped after {elapsed:.3f} seconds, the time limit is reached."
+        return None
+
+
+    def _calc_two_phase(self, verbose=False):
+        # phase 1 maximizes minus the sum of the artificial variables, anything under 0 is left of them
+        if self.z < -self._epsilon:
+            self.status, self.message = INFEASIBLE, "There is no solution for this problem."
         else:
             self.phase += 1
             self.iterations = 1
@@ -345,7 +718,9 @@ class LinearProgramming:
             self._cj = self.cj
             # remove artificial variables now
             lenart = len(self.constraints.artificials)
-            self.A = self.A[:, :-lenart]
+            self._drive_out_artificials()
+            self._engine.drop_columns(lenart)
+            self._pricing.reset(self._engine)
             # remove from cj aswell
             for iterator in self._cj:
                 for i in range(lenart):
@@ -356,14 +731,370 @@ class LinearProgramming:
                 real_coeff = self.cjdict[var]
                 self.vbs[1][i] = real_coeff
 
-            # calculate new pivot
-            self._get_pivot()
+            # calculate new pivot, there is none when presolve fixed every variable
+            if len(self._cj[1]):
+                self._get_pivot()
+            else:
+                self._cj_zj()
+            self._calc_z()
 
             # new iteration
             self.iterations += 1
 
-            self.calc(init=False, show_first=False, show_result=False)
-            return True
+            self._primal_iterations(verbose)
+
+    def _drive_out_artificials(self):
+        """
+        Pivots the artificial variables still basic ( at 0 ) after phase 1 out of the basis, on the largest cell
+        of their row in another column, so phase 2 can drop their columns.
+        A row without such a cell is redundant, its artificial variable stays basic at 0.
+        """
+        first = len(self._cj[1]) - len(self.constraints.artificials)
+        for row in np.flatnonzero(self._engine_basis >= first):
+            cells = np.abs(np.asarray(self._engine.row(row))[:first])
+            if cells.max(initial=0) <= self._epsilon:
+                continue
+            self._pivrow, self._pivcol = int(row), int(np.argmax(cells))
+            self._pivot_column = self._engine.column(self._pivcol)
+            self._pivot = self._pivot_column[self._pivrow]
+            self._pivot_engine()
+            self._update_vbs()
+
+    def _use_dual(self, method, engine, options):
+        """Checks the solve `method`, and sets up the dual simplex when it is asked for and applies"""
+        if method not in ("primal", "dual"):
+            raise ValueError(f"Unknown simplex method '{method}', expected 'primal' or 'dual'")
+        return method == "dual" and self.init_dual(engine, **options)
+
+    @timed("init")
+    def init_dual(self, engine="tableau", **options):
+        """
+        Initialize a start-up tableau for the dual simplex: every constraint is written as `<=` with a slack
+        variable only ( `Constraints.slack_form` ), so there are no artificial variables and no phase 1.
+        Returns False, leaving everything untouched, when the slack basis is not dual feasible
+        ( a coefficient of the objective function would already improve it ).
+        """
+        varnames, matrix, b, slacks = self.constraints.slack_form()
+        coefficients = dict(zip(self.objfunc.varnames, self.objfunc.z))
+        costs = [ coefficients.get(var, 0) for var in varnames ]
+        if any(self._improvable(c) for c in costs):
+            return False
+
+        self.method = "dual"
+        self.phase = 0
+        self.iterations = 0
+        self.varnames = varnames
+        self.cj = [varnames, costs]
+        self.cjdict = {var: coef for var, coef in zip(varnames, costs)}
+        self._cj = [varnames.copy(), costs.copy()]
+
+        self.conlen = len(b)
+        self.vbs = [list(slacks), [0] * self.conlen]
+        # the slacks are the last columns
+        self._basis = np.arange(len(varnames) - self.conlen, len(varnames))
+        self._engine_basis = self._basis.copy()
+        self._ratio_column = [np.inf] * self.conlen
+
+        self._engine = ENGINES[engine](matrix, b, **options)
+        self._matrix = matrix
+        self._engine_name, self._engine_options = engine, options
+        self._pricing.reset(self._engine)
+        self._start_solve()
+        self._cj_zj()
+        self._calc_z()
+        if self._profile is not None:
+            self._profile.start_laps()
+        return True
+
+    def _calc_dual(self, verbose, show_first):
+        if verbose and show_first:
+            self.show_current()
+        try:
+            self._dual_simplex(verbose)
+            self._primal_simplex(verbose)
+        except NotSolutionError as e:
+            self.status, self.message = e.status, e.message
+            return
+        self._calc_z()
+        self.status = OPTIMAL
+
+    def init_bounded(self, engine="tableau", **options):
+        """
+        Initialize a start-up tableau for the bounded simplex: the same as `init_mat`, with the upper bound
+        of every column, every nonbasic variable starts at its lower bound ( 0 once shifted )
+        """
+        self.init_mat(engine, **options)
+        self._upper = np.full(len(self.varnames), np.inf)
+        for j, var in enumerate(self.varnames):
+            if var in self.bounds:
+                self._upper[j] = self.bounds[var][1] - self.bounds[var][0]
+        self._at_upper = np.zeros(len(self.varnames), dtype=bool)
+        self._calc_z()
+
+    def _calc_bounded(self, verbose, init, show_first, engine, method, options):
+        if method != "primal":
+            raise ValueError("Bounded variables are only solved with the primal simplex")
+        try:
+            if init:
+                for var, (lower, upper) in self.bounds.items():
+                    if lower > upper + EPSILON:
+                        raise NotSolutionError(f"{var} has a lower bound {lower} above its upper bound {upper}.", INFEASIBLE)
+                self.init_bounded(engine, **options)
+            if verbose and show_first:
+                self.show_current()
+            self._bounded_simplex(verbose)
+            if self.phase == 1:
+                self._end_bounded_phase1()
+                self._bounded_simplex(verbose)
+        except NotSolutionError as e:
+            self.status, self.message = e.status, e.message
+            return
+        self._calc_z()
+        self.status = OPTIMAL
+
+    def _end_bounded_phase1(self):
+        """Checks phase 1 found a feasible point and goes on with the real objective function"""
+        self._calc_z()
+        if self.z < -self._epsilon:
+            raise NotSolutionError("There is no solution for this problem.", INFEASIBLE)
+        self.phase += 1
+        self._set_optimize(self._opt)
+        self._cj = [self.cj[0].copy(), self.cj[1].copy()]
+        self.vbs[1] = [ self._cj[1][j] for j in self._engine_basis ]
+        # artificial variables stay in the tableau, fixed at 0
+        for var in self.constraints.artificials:
+            self._upper[self.varnames.index(var)] = 0
+
+    def _bounded_simplex(self, verbose=False):
+        """
+        Primal simplex iterations where nonbasic variables sit at their lower or upper bound:
+        the entering variable moves away from its bound until a basic variable reaches one of its bounds,
+        or until it reaches its own other bound ( a bound flip, the basis stays the same )
+        """
+        while True:
+            self._cj_zj()
+            # Cj-Zj in the direction the variable can move
+            direction = np.where(self._at_upper, -1.0, 1.0)
+            cj_zj = direction * np.asarray(self.cj_zj, dtype=float)
+            improving = self._improvable(cj_zj) & (self._upper > 0)
+            if not improving.any():
+                return
+            self._check_limits()
+
+            scores = self._pricing.scores(cj_zj, improving)
+            worst = -np.inf if self.opt is max else np.inf
+            scores = np.where(improving, scores, worst)
+            self._pivcol = int(np.argmax(scores) if self.opt is max else np.argmin(scores))
+            self._pivot_column = self._engine.column(self._pivcol)
+
+            # how far the entering variable can move before every basic variable reaches its bound
+            values = np.asarray(self._basic_values(), dtype=float)
+            step = direction[self._pivcol] * np.asarray(self._pivot_column, dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                to_lower = np.where(step > EPSILON, values / step, np.inf)
+                to_upper = np.where(step < -EPSILON, (self._upper[self._engine_basis] - values) / -step, np.inf)
+            self._ratio_column = np.maximum(np.minimum(to_lower, to_upper), 0)
+            self._pivrow = int(np.argmin(self._ratio_column))
+            limit = self._ratio_column[self._pivrow]
+
+            self.iterations += 1
+            if self._upper[self._pivcol] <= limit:
+                if self._upper[self._pivcol] == np.inf:
+                    raise NotSolutionError("The problem is unbounded.", UNBOUNDED)
+                # bound flip
+                self._at_upper[self._pivcol] = not self._at_upper[self._pivcol]
+                self._pivots += 1
+                if self._profile is not None:
+                    self._profile.count("bound flips")
+            else:
+                leaving = self._engine_basis[self._pivrow]
+                self._pivot = self._pivot_column[self._pivrow]
+                self._pivot_engine()
+                self._update_vbs()
+                self._at_upper[self._pivcol] = False
+                self._at_upper[leaving] = to_upper[self._pivrow] < to_lower[self._pivrow]
+            if verbose:
+                self._show_iteration()
+
+    def resolve(self, new_b=None, new_c=None):
+        """
+        Solves the problem again after changing right-hand sides and/or objective coefficients,
+        starting from the final basis of the previous solve instead of running phase 1 again:
+            - dual simplex while the old basis is not primal feasible anymore
+            - primal simplex while it is not optimal anymore
+        When neither of them applies ( or the old basis can't be used ), the problem is solved from scratch.
+        `new_b` is a list of right-hand sides as written in the constraints, or a dict {constraint index: value},
+        `new_c` is a list in `objfunc.varnames` order, or a dict {variable: coefficient}.
+        Returns a `SolveResult` like `silent_calc`, a changed problem without solution is one of its statuses.
+        """
+        if self.bounds:
+            raise ValueError("Problems with bounded variables can not be solved again, solve the changed problem instead")
+        written_b = [ sign * b for sign, b in zip(self.constraints.signs, self._rhs) ]
+        if isinstance(new_b, dict):
+            for i, value in new_b.items():
+                written_b[i] = value
+        elif new_b is not None:
+            written_b = list(new_b)
+        if len(written_b) != self.conlen:
+            raise ValueError(f"Expected {self.conlen} right-hand sides, got {len(written_b)}")
+
+        if new_c is not None:
+            self._set_objective(new_c)
+
+        basis = self._basis_columns()
+        if self._engine is None or self.phase == 1 or self.method == "dual" or basis is None:
+            return self._cold_resolve(written_b)
+
+        b = [ sign * value for sign, value in zip(self.constraints.signs, written_b) ]
+        engine = ENGINES[self._engine_name](self.constraints.matrix, b, **self._engine_options)
+        try:
+            engine.set_basis(basis)
+        except (np.linalg.LinAlgError, SingularBasisError):
+            return self._cold_resolve(written_b)
+        if self.phase == 2:
+            engine.drop_columns(len(self.constraints.artificials))
+        self._engine = engine
+        self._pricing.reset(engine)
+        self._start_solve()
+        self._engine_basis = np.array(basis)
+        self._rhs = b
+
+        self._cj = [self.varnames, [ self.cjdict[var] for var in self.varnames ]]
+        self.vbs[1] = [ self.cjdict[var] for var in self.vbs[0] ]
+
+        self._cj_zj()
+        primal_infeasible = min(self.b) < -self._epsilon
+        if primal_infeasible and self._improvable(self.opt(self.cj_zj)):
+            # neither primal nor dual feasible
+            return self._cold_resolve(written_b)
+
+        try:
+            if primal_infeasible:
+                self._dual_simplex()
+            self._primal_simplex()
+        except NotSolutionError as e:
+            self.status, self.message = e.status, e.message
+            return self.result()
+        self._calc_z()
+        self.status, self.message = OPTIMAL, None
+        return self.result()
+
+    def sensitivity(self):
+        """
+        Shadow prices, reduced costs and the allowable ranges of every b and objective coefficient,
+        computed from the final tableau of a solved problem ( see `sensitivity.analyze` ).
+        """
+        if self.bounds:
+            raise ValueError("Sensitivity analysis of bounded variables is not supported")
+        if self._engine is None or self.phase == 1 or self.is_not_optimized():
+            raise NotSolutionError("Solution not reached yet.")
+        written_b = [ sign * b for sign, b in zip(self.constraints.signs, self._rhs) ]
+        written_vars = self._written_vars()
+        return analyze(self._matrix.toarray(), self.A, self.b, self._cj[1], self._cj[0], self.opt is max,
+                       row_factors(self.constraints, dual=self.method == "dual"), written_b, written_vars,
+                       self.objfunc.fname, [ c.string for c in self.constraints.constraints ])
+
+    def _written_vars(self):
+        """Variables of the objective function and of the constraints as written, without slack or artificial ones"""
+        written = set(self.objfunc.varnames)
+        for c in self.constraints.constraints:
+            written.update(c.varnames[:c.structural])
+        return written
+
+    def _set_objective(self, new_c):
+        """Replaces the objective function coefficients"""
+        if isinstance(new_c, dict):
+            coefficients = dict(self.objfunc.var2ceof)
+            coefficients.update(new_c)
+            new_c = [ coefficients[var] for var in self.objfunc.varnames ]
+        if len(new_c) != len(self.objfunc.varnames):
+            raise ValueError(f"Expected {len(self.objfunc.varnames)} objective coefficients, got {len(new_c)}")
+
+        self.objfunc = copy.copy(self.objfunc)
+        self.objfunc.z = [ float(c) for c in new_c ]
+        self.objfunc.var2ceof = {var: coef for var, coef in zip(self.objfunc.varnames, self.objfunc.z)}
+
+        self.cjdict.update(self.objfunc.var2ceof)
+        self.cj[1][:] = [ self.cjdict[var] for var in self.cj[0] ]
+
+    def _basis_columns(self):
+        """Columns of the current basic variables, None if they aren't a basis"""
+        basis = self._engine_basis
+        if (basis < 0).any() or len(np.unique(basis)) != len(basis) or (basis >= len(self._cj[1])).any():
+            return None
+        return basis.tolist()
+
+    def _cold_resolve(self, written_b):
+        """Rebuilds the constraints with the new right-hand sides and solves from scratch"""
+        rows = []
+        for constraint, b in zip(self.constraints.constraints, written_b):
+            left, op, _ = Constraint.SPLITTER_PATTERN.split(constraint.string)
+            rows.append(f"{left.strip()} {op} {b}")
+        engine, options, postsolve = self._engine_name, self._engine_options, self.postsolve
+        # start over with a fresh state
+        self.__init__(self.objfunc, Constraints.from_iterable(rows), pricing=self._pricing,
+                      max_iterations=self.max_iterations, time_limit=self.time_limit)
+        self.postsolve = postsolve
+        return self.silent_calc(engine, **options)
+
+    def _improvable(self, cj_zj):
+        """Checks if a Cj-Zj value can still improve the objective function"""
+        return cj_zj > self._cost_epsilon if self.opt is max else cj_zj < -self._cost_epsilon
+
+    def _primal_simplex(self, verbose=False):
+        """Primal simplex iterations from a primal feasible basis"""
+        while True:
+            self._get_pivot_column()
+            if not self._improvable(self.cj_zj[self._pivcol]):
+                # optimal, drop the rounding noise
+                self.cj_zj = [ 0 if abs(item) < self._cost_epsilon else item for item in self.cj_zj ]
+                return
+            self._check_limits()
+            self._get_pivot_row()
+            if self._ratio_column[self._pivrow] == np.inf:
+                raise NotSolutionError("The problem is unbounded.", UNBOUNDED)
+            self._pivot = self._pivot_column[self._pivrow]
+            self._pivot_engine()
+            self._update_vbs()
+            self.iterations += 1
+            if verbose:
+                self._show_iteration()
+
+    def _dual_simplex(self, verbose=False):
+        """Dual simplex iterations from an optimal basis that is not primal feasible"""
+        while True:
+            b = np.asarray(self.b, dtype=float)
+            self._pivrow = int(np.argmin(b))
+            if b[self._pivrow] >= -self._epsilon:
+                return
+            self._check_limits()
+            # the entering variable keeps Cj-Zj optimal: smallest |Cj-Zj / a| over the negative cells of the row
+            self._cj_zj()
+            row = np.asarray(self._engine.row(self._pivrow))
+            candidates = row < -EPSILON
+            if not candidates.any():
+                raise NotSolutionError("There is no solution for this problem.", INFEASIBLE)
+            ratios = np.full(len(row), np.inf)
+            ratios[candidates] = np.abs(np.asarray(self.cj_zj)[candidates] / row[candidates])
+            self._pivcol = int(np.argmin(ratios))
+            self._pivot_column = self._engine.column(self._pivcol)
+            self._pivot = self._pivot_column[self._pivrow]
+            self._pivot_engine()
+            self._update_vbs()
+            self.iterations += 1
+            if verbose:
+                self._show_iteration()
+
+    def _check_limits(self):
+        reached = self._limit_reached()
+        if reached is not None:
+            status, message = reached
+            raise NotSolutionError(message, status)
+
+    def _show_iteration(self):
+        self._cj_zj()
+        self._calc_z()
+        self.show_current()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import gzip
+import mmap
+import os
+from linparse import ObjectiveFunction, Constraint, ConstraintsBuilder, NotValidObjectiveFunctionError, NotValidConstraintError, naming
+
+
+"""
+Read a whole model from a file, one line at a time
+
+LP files hold the objective function on the first line and one constraint per line after it,
+blank lines and lines starting with `#` are skipped:
+
+    max z = 3x1 + 2x2
+    x1 + x2 <= 4
+    x1 + 3x2 <= 6
+
+MPS files ( free format, sections NAME, OBJSENSE, ROWS, COLUMNS, RHS and ENDATA ) are read as well.
+Plain files are memory-mapped and `.gz` files decompressed on the fly, rows go straight into a
+`ConstraintsBuilder` so the file is never read in memory as a whole. Every `Constraint` still keeps
+the text of its row ( `string` ), memory grows with the model as it does for models built in Python.
+
+    objfunc, constraints = read_model("model.lp.gz")
+"""
+
+
+class NotValidModelFileError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def _lines(path):
+    """Yields (line number, decoded line) of a plain or gzip file"""
+    with open(path, "rb") as file:
+        compressed = file.read(2) == b"\x1f\x8b"
+    if compressed:
+        with gzip.open(path, "rb") as file:
+            for number, line in enumerate(file, 1):
+                yield number, line.decode()
+        return
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for number, line in enumerate(iter(mapped.readline, b""), 1):
+            yield number, line.decode()
+
+
+def _stripped(path):
+    """Yields (line number, line) of the lines that are not blank or comments, leading blanks are kept"""
+    for number, line in _lines(path):
+        line = line.rstrip()
+        if line and not line.lstrip().startswith(("#", "*")):
+            yield number, line
+
+
+def read_lp(path):
+    """Reads an objective function line followed by one constraint per line"""
+    objfunc = None
+    builder = ConstraintsBuilder()
+    for number, line in _stripped(path):
+        try:
+            if objfunc is None:
+                objfunc = ObjectiveFunction(line)
+            else:
+                builder.add(line)
+        except (NotValidObjectiveFunctionError, NotValidConstraintError) as e:
+            raise type(e)(f"{path}, line {number}: {e.message}") from e
+    if objfunc is None:
+        raise NotValidModelFileError(f"{path} has no objective function")
+    if not builder:
+        raise NotValidModelFileError(f"{path} has no constraint")
+    return objfunc, builder.build()
+
+
+MPS_SECTIONS = ("NAME", "OBJSENSE", "ROWS", "COLUMNS", "RHS", "RANGES", "BOUNDS", "ENDATA")
+
+# operator of every MPS row type
+MPS_SENSES = {"L": "<=", "G": ">=", "E": "="}
+
+
+def read_mps(path):
+    """
+    Reads a free MPS file: the first N row is the objective function ( minimized unless OBJSENSE says MAX ),
+    RANGES and BOUNDS sections and a constant on the objective row ( its RHS ) are not supported.
+    Column names must follow the usual `x1`, `x2` ... naming of the variables.
+    """
+    optimize, fname = "min", None
+    # row name -> [operator, {column: coefficient}, b], in ROWS order
+    rows = {}
+    costs = {}
+    section = None
+
+    for number, line in _stripped(path):
+        fields = line.split()
+        # section headers start on the first column, data lines are indented
+        if not line[0].isspace() and fields[0] in MPS_SECTIONS:
+            section = fields[0]
+            if section in ("RANGES", "BOUNDS"):
+                raise NotValidModelFileError(f"{path}, line {number}: MPS section {section} is not supported")
+            if section == "ENDATA":
+                break
+            if section == "OBJSENSE" and len(fields) > 1:
+                optimize = _objsense(path, number, fields[1])
+            continue
+
+        if section == "OBJSENSE":
+            optimize = _objsense(path, number, fields[0])
+        elif section == "ROWS":
+            kind, name = fields[0], fields[1]
+            if kind == "N":
+                fname = fname or name
+            elif kind in MPS_SENSES:
+                rows[name] = [MPS_SENSES[kind], {}, 0.0]
+            else:
+                raise NotValidModelFileError(f"{path}, line {number}: unknown row type '{kind}'")
+        elif section in ("COLUMNS", "RHS"):
+            if "'MARKER'" in fields:
+                continue
+            # the name of the RHS set is optional
+            name, pairs = (None, fields) if section == "RHS" and len(fields) % 2 == 0 else (fields[0], fields[1:])
+            if len(pairs) % 2:
+                raise NotValidModelFileError(f"{path}, line {number}: expected (row, value) pairs")
+            for row, value in zip(pairs[0::2], pairs[1::2]):
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise NotValidModelFileError(f"{path}, line {number}: '{value}' is not a number")
+                if row == fname:
+                    if section == "COLUMNS":
+                        costs[name] = value
+                    elif value:
+                        # `ObjectiveFunction` has no room for a constant, z would be off by it
+                        raise NotValidModelFileError(f"{path}, line {number}: constant {-value} of the objective row is not supported")
+                elif row not in rows:
+                    raise NotValidModelFileError(f"{path}, line {number}: unknown row '{row}'")
+                elif section == "COLUMNS":
+                    rows[row][1][name] = value
+                else:
+                    rows[row][2] = value
+        else:
+            raise NotValidModelFileError(f"{path}, line {number}: data outside of a section")
+
+    if fname is None:
+        raise NotValidModelFileError(f"{path} has no objective row ( N )")
+    if not rows:
+        raise NotValidModelFileError(f"{path} has no constraint")
+
+    builder = ConstraintsBuilder()
+    for op, terms, b in rows.values():
+        builder.add(Constraint.from_terms(list(terms), list(terms.values()), op, b))
+    objfunc = ObjectiveFunction.from_terms(optimize, fname, list(costs), list(costs.values()))
+    return objfunc, builder.build()
+
+
+def _objsense(path, number, sense):
+    if sense.upper() in ("MAX", "MAXIMIZE"):
+        return "max"
+    if sense.upper() in ("MIN", "MINIMIZE"):
+        return "min"
+    raise NotValidModelFileError(f"{path}, line {number}: unknown OBJSENSE '{sense}'")
+
+
+def read_model(path, format=None):
+    """
+    Reads an LP or MPS model and returns (ObjectiveFunction, Constraints), `format` is "lp" or "mps"
+    and by default comes from the file extension ( `.mps` or `.mps.gz`, anything else is read as LP ).
+    The slack and artificial variables of the model are numbered from 1 ( see `linparse.naming` ).
+    """
+    if format is None:
+        name = os.fspath(path).lower()
+        if name.endswith(".gz"):
+            name = name[:-3]
+        format = "mps" if name.endswith(".mps") else "lp"
+    if format not in ("lp", "mps"):
+        raise ValueError(f"Unknown model format '{format}', expected 'lp' or 'mps'")
+    with naming():
+        return read_lp(path) if format == "lp" else read_mps(path)
@@ -0,0 +1,92 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+"""
+Size-bounded least recently used cache, with hit / miss counters and an optional disk tier
+
+Used for the solve results ( `cache.RESULTS` ) and the parsed expressions ( `linparse.PARSED` ).
+"""
+
+
+class LRUCache:
+    """
+    At most `maxsize` values in memory, the least recently used one is dropped first.
+    With a `path` every value is also pickled in that directory, a value dropped from memory is read
+    back from there ( and never dropped from disk, `clear` removes them ).
+    """
+
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+        # lookups found in memory or on disk ( `disk_hits` of the `hits` ), and not found
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items or (self.path is not None and os.path.exists(self._file(key)))
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.pickle")
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        if self.path is not None:
+            try:
+                with open(self._file(key), "rb") as file:
+                    value = pickle.load(file)
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.path is not None:
+            # written next to it and renamed, a reader never sees half a file
+            temporary = f"{self._file(key)}.{os.getpid()}.{threading.get_ident()}"
+            with open(temporary, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._file(key))
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if self.path is not None:
+            for name in os.listdir(self.path):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.path, name))
+
+    def stats(self):
+        return {"size": len(self), "maxsize": self.maxsize, "hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses}
@@ -0,0 +1,221 @@
+from linparse import ObjectiveFunction, Constraint, ConstraintsBuilder
+
+
+"""
+Presolve: shrink a model before it reaches the simplex tableau
+
+Reductions, repeated until none of them applies anymore:
+    - empty rows are checked and removed
+    - singleton equalities ( a xj = b ) fix their variable, which is substituted everywhere
+    - singleton inequalities are bounds: redundant ones ( xj >= negative ) are removed,
+      xj <= 0 fixes xj, and only the tightest lower/upper bound of each variable is kept
+    - duplicate rows ( also scaled ones ) keep only the tightest of them
+    - variables of the objective function that are in no constraint are fixed at 0
+
+Every reduction is pushed on the `Postsolve` stack, which gives back the values of the
+removed variables and the objective function offset once the reduced problem is solved.
+"""
+
+# values closer than this are considered equal
+EPSILON = 1e-9
+
+
+class InfeasibleError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class UnboundedError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class Postsolve:
+    """Stack of the presolve reductions, to report the solution in terms of the original problem"""
+
+    def __init__(self, varnames):
+        # variables of the original problem
+        self.varnames = varnames
+        # (reduction, constraint index or variable, value) in the order they were done
+        self.stack = []
+        # objective function value of the fixed variables
+        self.offset = 0.0
+        self.fixed = {}
+
+    def __len__(self):
+        return len(self.stack)
+
+    def push(self, reduction, item, value=None):
+        self.stack.append((reduction, item, value))
+
+    def fix(self, var, value, cost):
+        self.fixed[var] = value
+        self.offset += cost * value
+        self.push("fix", var, value)
+
+    @property
+    def removed_rows(self):
+        return [ item for reduction, item, _ in self.stack if reduction != "fix" ]
+
+    def apply(self, values):
+        """Returns the values of all the original variables from `values` of the reduced problem"""
+        restored = {var: 0.0 for var in self.varnames}
+        restored.update(values)
+        for reduction, var, value in reversed(self.stack):
+            if reduction == "fix":
+                restored[var] = float(value)
+        return restored
+
+
+def _satisfied(lhs, sense, rhs):
+    if sense == "<=":
+        return lhs <= rhs + EPSILON
+    if sense == ">=":
+        return lhs >= rhs - EPSILON
+    return abs(lhs - rhs) <= EPSILON
+
+
+class _Presolver:
+
+    def __init__(self, objfunc, constraints):
+        self.objfunc = objfunc
+        self.cost = dict(zip(objfunc.varnames, objfunc.z))
+
+        # [written terms {var: coefficient}, written operator, written b, original index]
+        self.rows = []
+        varnames = list(objfunc.varnames)
+        for i, c in enumerate(constraints.constraints):
+            terms = {}
+            for var, coef in zip(c.varnames[:c.structural], c.a[:c.structural]):
+                if coef != 0:
+                    terms[var] = c.sign * coef
+                if var not in varnames:
+                    varnames.append(var)
+            self.rows.append([terms, c.sense, c.sign * c.b, i])
+
+        self.postsolve = Postsolve(varnames)
+
+    def run(self):
+        changed = True
+        while changed:
+            changed = self._singleton_rows() | self._duplicate_rows() | self._bounds() | self._empty_columns()
+        return self._rebuild()
+
+    def _remove_row(self, row, reduction):
+        # a problem needs at least one constraint, the last one is kept whatever it is
+        if len(self.rows) == 1:
+            return False
+        self.rows.remove(row)
+        self.postsolve.push(reduction, row[3])
+        return True
+
+    def _fix(self, var, value):
+        if value < -EPSILON:
+            raise InfeasibleError(f"{var} would have to be negative ({value})")
+        value = max(value, 0.0)
+        for row in self.rows:
+            coef = row[0].pop(var, None)
+            if coef is not None:
+                row[2] -= coef * value
+        self.postsolve.fix(var, value, self.cost.pop(var, 0.0))
+
+    def _singleton_rows(self):
+        changed = False
+        for row in list(self.rows):
+            terms, sense, rhs, index = row
+            if not terms:
+                if not _satisfied(0, sense, rhs):
+                    raise InfeasibleError(f"Constraint {index} can not be satisfied: 0 {sense} {rhs}")
+                changed |= self._remove_row(row, "empty_row")
+            elif len(terms) == 1:
+                (var, coef), = terms.items()
+                value = rhs / coef
+                upper = (sense == "<=") == (coef > 0)
+                if sense == "=" or (sense != "=" and upper and abs(value) <= EPSILON):
+                    if self._remove_row(row, "singleton_row"):
+                        self._fix(var, value)
+                        changed = True
+                elif upper and value < -EPSILON:
+                    raise InfeasibleError(f"{var} <= {value} with {var} >= 0")
+                elif not upper and value <= EPSILON:
+                    # xj >= negative, always true
+                    changed |= self._remove_row(row, "redundant_bound")
+        return changed
+
+    def _duplicate_rows(self):
+        changed = False
+        kept = {}
+        for row in list(self.rows):
+            terms, sense, rhs, index = row
+            if not terms:
+                continue
+            # rows are compared once scaled by their first coefficient
+            scale = abs(terms[min(terms)])
+            key = (sense, tuple(sorted((var, coef / scale) for var, coef in terms.items())))
+            if key not in kept:
+                kept[key] = row
+                continue
+            other = kept[key]
+            other_scale = abs(other[0][min(other[0])])
+            mine, theirs = rhs / scale, other[2] / other_scale
+            if sense == "=" and abs(mine - theirs) > EPSILON:
+                raise InfeasibleError(f"Constraints {other[3]} and {index} are the same equality with different b")
+            tighter = (sense == "<=" and mine < theirs) or (sense == ">=" and mine > theirs)
+            if tighter:
+                # the kept row keeps its own terms, the new b is brought to their scale
+                other[2] = rhs * other_scale / scale
+            changed |= self._remove_row(row, "duplicate_row")
+        return changed
+
+    def _bounds(self):
+        """Fixes variables whose lower and upper bound rows meet"""
+        lower, upper = {}, {}
+        for terms, sense, rhs, _ in self.rows:
+            if len(terms) != 1 or sense == "=":
+                continue
+            (var, coef), = terms.items()
+            bounds = upper if (sense == "<=") == (coef > 0) else lower
+            value = rhs / coef
+            if var not in bounds or (bounds is upper and value < bounds[var]) or (bounds is lower and value > bounds[var]):
+                bounds[var] = value
+        for var in lower.keys() & upper.keys():
+            if lower[var] > upper[var] + EPSILON:
+                raise InfeasibleError(f"{var} has a lower bound {lower[var]} above its upper bound {upper[var]}")
+            if abs(lower[var] - upper[var]) <= EPSILON:
+                rows = [ row for row in self.rows if len(row[0]) == 1 and var in row[0] ]
+                if len(rows) < len(self.rows):
+                    for row in rows:
+                        self._remove_row(row, "singleton_row")
+                    self._fix(var, upper[var])
+                    return True
+        return False
+
+    def _empty_columns(self):
+        changed = False
+        used = { var for row in self.rows for var in row[0] }
+        maximize = self.objfunc.optimize.startswith("max")
+        for var, coef in list(self.cost.items()):
+            if var in used:
+                continue
+            if (maximize and coef > 0) or (not maximize and coef < 0):
+                raise UnboundedError(f"{var} improves the objective function and is in no constraint")
+            self._fix(var, 0.0)
+            changed = True
+        return changed
+
+    def _rebuild(self):
+        builder = ConstraintsBuilder()
+        for terms, sense, rhs, _ in self.rows:
+            builder.add(Constraint.from_terms(list(terms), list(terms.values()), sense, rhs))
+        objfunc = ObjectiveFunction.from_terms(self.objfunc.optimize, self.objfunc.fname,
+                                               list(self.cost), list(self.cost.values()))
+        return objfunc, builder.build(), self.postsolve
+
+
+def run_presolve(objfunc, constraints):
+    """
+    Reduces the problem ( `objfunc`, `constraints` ) and returns the reduced objective function,
+    the reduced constraints and the `Postsolve` stack.
+    Raises `InfeasibleError` or `UnboundedError` when presolve already proves the problem has no solution.
+    """
+    return _Presolver(objfunc, constraints).run()
@@ -0,0 +1,124 @@
+import numpy as np
+
+
+"""
+Pricing rules: which improving column enters the basis
+
+Every rule turns the Cj-Zj row into scores, the column with the best score ( largest when maximizing,
+smallest when minimizing ) enters, ties are broken by `LinearProgramming` like before:
+
+    - dantzig     the most improving Cj-Zj itself
+    - steepest    Cj-Zj / ||column||, the exact norm of every tableau column kept up to date on every pivot
+    - devex       Cj-Zj / sqrt(w), w approximate norms in a reference framework ( cheaper than steepest edge )
+    - partial     Dantzig on a rotating block of columns only, the next block is used on the next iteration
+
+A rule is picked with `LinearProgramming(objfunc, constraints, pricing="devex")`, or passed as an instance
+to set its options, e.g. `pricing=PartialPricing(blocks=4)`.
+"""
+
+# devex weights are set back to 1 when one grows over this ( the reference framework is too old )
+DEVEX_RESET = 1e6
+
+
+class Dantzig:
+    """Most improving Cj-Zj"""
+
+    name = "dantzig"
+
+    def __init__(self):
+        self.weights = None
+
+    def reset(self, engine):
+        """Starts over on the current basis of `engine`"""
+
+    def scores(self, cj_zj, improving):
+        return cj_zj
+
+    def update(self, engine, pivrow, pivcol, pivot_column):
+        """Called before `engine` pivots on (`pivrow`, `pivcol`), `pivot_column` is the entering tableau column"""
+
+
+class SteepestEdge(Dantzig):
+    """Cj-Zj divided by the norm of the edge it moves along, 1 + ||B^-1 aj||^2 updated exactly on every pivot"""
+
+    name = "steepest"
+
+    def reset(self, engine):
+        self.weights = 1 + (np.asarray(engine.A, dtype=float) ** 2).sum(axis=0)
+
+    def scores(self, cj_zj, improving):
+        return np.where(improving, cj_zj / np.sqrt(self.weights), 0)
+
+    def update(self, engine, pivrow, pivcol, pivot_column):
+        # column j becomes Tj - θj (Tq - er) with θj = αrj / αrq
+        alpha_q = np.asarray(pivot_column, dtype=float)
+        theta = np.asarray(engine.row(pivrow), dtype=float) / alpha_q[pivrow]
+        dots = engine.combine_rows(alpha_q)
+        weights = self.weights - 2 * theta * (dots - theta * alpha_q[pivrow]) + theta**2 * (self.weights[pivcol] - 2 * alpha_q[pivrow])
+        self.weights = np.maximum(weights, 1)
+
+
+class Devex(Dantzig):
+    """Cj-Zj divided by approximate edge norms, measured in the reference framework of the last reset"""
+
+    name = "devex"
+
+    def reset(self, engine):
+        self.weights = np.ones(len(engine.row(0)))
+
+    def scores(self, cj_zj, improving):
+        return np.where(improving, cj_zj / np.sqrt(self.weights), 0)
+
+    def update(self, engine, pivrow, pivcol, pivot_column):
+        alpha = np.asarray(engine.row(pivrow), dtype=float)
+        pivot = alpha[pivcol]
+        entering = self.weights[pivcol]
+        self.weights = np.maximum(self.weights, (alpha / pivot) ** 2 * entering)
+        self.weights[pivcol] = max(entering / pivot**2, 1)
+        if self.weights.max() > DEVEX_RESET:
+            self.weights[:] = 1
+
+
+class PartialPricing(Dantzig):
+    """Dantzig's rule over one block of columns, the blocks are scanned in turn until one can improve"""
+
+    name = "partial"
+
+    def __init__(self, blocks=4):
+        super().__init__()
+        self.blocks = blocks
+        # first block looked at on the next iteration
+        self._next = 0
+
+    def reset(self, engine):
+        self._next = 0
+
+    def scores(self, cj_zj, improving):
+        bounds = np.linspace(0, len(cj_zj), self.blocks + 1).astype(int)
+        for k in range(self.blocks):
+            block = (self._next + k) % self.blocks
+            start, stop = bounds[block], bounds[block + 1]
+            if improving[start:stop].any():
+                self._next = (block + 1) % self.blocks
+                scores = np.zeros(len(cj_zj))
+                scores[start:stop] = cj_zj[start:stop]
+                return scores
+        # nothing improves anywhere
+        return cj_zj
+
+
+PRICING_RULES = {
+    "dantzig": Dantzig,
+    "steepest": SteepestEdge,
+    "devex": Devex,
+    "partial": PartialPricing,
+}
+
+
+def make_pricing(rule):
+    """A pricing rule from its name in `PRICING_RULES`, rule instances are returned as they are"""
+    if not isinstance(rule, str):
+        return rule
+    if rule not in PRICING_RULES:
+        raise ValueError(f"Unknown pricing rule '{rule}', expected one of {list(PRICING_RULES)}")
+    return PRICING_RULES[rule]()
@@ -0,0 +1,102 @@
+import functools
+import json
+import time
+from contextvars import ContextVar
+
+
+"""
+Optional timings and counters of parsing and solving
+
+Nothing is recorded unless a `Profile` is active, then every parse, merge and solve done in its
+`with` block ( in the same thread / task ) is added to it:
+
+    with Profile() as profile:
+        linprog = LinearProgramming(ObjectiveFunction(...), Constraints.from_iterable(rows))
+        linprog.silent_calc()
+    metrics = profile.as_dict()        # or profile.to_json()
+
+Switched off, an instrumented function costs one context variable lookup, so the hooks can stay in place.
+"""
+
+# the recording `Profile` of the current context, None when profiling is off
+_ACTIVE = ContextVar("profile", default=None)
+
+
+def active():
+    """The `Profile` recording in this context, None when there is none"""
+    return _ACTIVE.get()
+
+
+def timed(stage):
+    """Decorator adding the time spent in the function to the `stage` of the active profile"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _ACTIVE.get()
+            if profile is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.add_time(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class Profile:
+    """Timings per stage, counters and ( with `iterations` ) one record per simplex pivot"""
+
+    def __init__(self, iterations=True):
+        # {stage: seconds} and {stage: calls}
+        self.timings = {}
+        self.calls = {}
+        # pivots, degenerate pivots, ratio ties ...
+        self.counters = {}
+        # keep a record of every pivot, or only the totals
+        self.keep_iterations = iterations
+        self.iterations = []
+
+        self._token = None
+        # end of the last lap, see `lap`
+        self._last = None
+
+    def __enter__(self):
+        self._token = _ACTIVE.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _ACTIVE.reset(self._token)
+        self._token = None
+
+    def add_time(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def start_laps(self):
+        self._last = time.perf_counter()
+
+    def lap(self):
+        """Seconds since the last lap ( or `start_laps` )"""
+        now = time.perf_counter()
+        seconds = now - (self._last if self._last is not None else now)
+        self._last = now
+        return seconds
+
+    def record_iteration(self, **record):
+        if self.keep_iterations:
+            self.iterations.append(record)
+
+    def as_dict(self):
+        return {
+            "timings": dict(self.timings),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+            "iterations": list(self.iterations),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
@@ -0,0 +1,79 @@
+import numpy as np
+
+try:
+    from colorama import Fore, init
+except ImportError:
+    Fore = None
+
+
+"""
+Text rendering of a `LinearProgramming` ( its tableau and result ), kept out of the solver
+
+Nothing here is needed to solve, `silent_calc` never imports this module.
+colorama is optional, without it the tableau is shown without colors.
+"""
+
+if Fore is not None:
+    init()
+    WHITE = Fore.WHITE
+    PIVOT_COLUMN_COLOR = Fore.CYAN
+    PIVOT_ROW_COLOR = Fore.YELLOW
+    PIVOT_COLOR = Fore.RED
+    Z_COLOR = Fore.GREEN
+else:
+    WHITE = PIVOT_COLUMN_COLOR = PIVOT_ROW_COLOR = PIVOT_COLOR = Z_COLOR = ""
+
+
+def show_tableau(linprog):
+    """Prints the current simplex tableau of `linprog`"""
+    # cj
+    print(f"==========={'MAXIMIZATION' if linprog.opt is max else 'MINIMIZATION'}===========")
+    phase = "" if linprog.phase == 0 else f" PHASE {linprog.phase} "
+    print("-"*45 + f" Iteration {linprog.iterations:<3}{phase}" + "-"*45)
+    print("   {}{:6}".format(WHITE, "Cj"), end='')
+    print("    ", end='')
+    for item in linprog._cj[1]:
+        print(f"{WHITE}{item:7.2f}{WHITE}", end='  ')
+    print("    " + 8*" " + " ")
+    # -------------------------
+    print(" "*9 + "VB", end='      ')
+    for var in linprog.varnames:
+        print(f"{var:6}", end='   ')
+    print("b        θ")
+    # -------------------------
+    for vb_vars, vb_values, row, b, ratio in zip(linprog.vbs[0], linprog.vbs[1], enumerate(linprog.A), linprog.b, linprog._ratio_column):
+        irow, row = row
+        print(f"{WHITE}{vb_values:7.2f}{WHITE}", end='  ')
+        print(f"{WHITE}{vb_vars:2}{WHITE}", end='  ')
+        for icolumn, cell in enumerate(row):
+            color = PIVOT_ROW_COLOR if irow == linprog._pivrow else WHITE
+            if icolumn == linprog._pivcol:
+                if color == PIVOT_ROW_COLOR:
+                    color = PIVOT_COLOR
+                else:
+                    color = PIVOT_COLUMN_COLOR
+            print(f"{color}{cell:7.2f}{WHITE}", end='  ')
+        print(f"{color}{b:7.2f}{WHITE}", end='  ')
+        print(f"{ratio:7.2f}")
+    # cj-zj
+    print("   {}{:6}".format(WHITE, "Cj-Zj"), end='    ')
+    for item in linprog.cj_zj:
+        print(f"{item:7.2f}", end='  ')
+    print(f"{Z_COLOR}{linprog.z:7.2f}{WHITE}")
+
+
+def show_result(linprog):
+    """Prints the values of the variables and the objective function of a solved `linprog` ( not very beautiful )"""
+    print("-"*25, "RESULT", "-"*25, sep="-")
+    for vb, value in zip(linprog.vbs[0], linprog._basic_values()):
+        value += linprog.bounds.get(vb, (0.0,))[0]
+        print(" "*20, vb, "=", f"{value:10.3f}", " "*20, end=' |\n')
+    if linprog._upper is not None:
+        for j in np.flatnonzero(linprog._at_upper):
+            var = linprog.varnames[j]
+            value = linprog.bounds[var][1]
+            print(" "*20, var, "=", f"{value:10.3f}", " "*20, end=' | (upper bound)\n')
+    if linprog.postsolve is not None:
+        for var, value in linprog.postsolve.fixed.items():
+            print(" "*20, var, "=", f"{value:10.3f}", " "*20, end=' | (presolve)\n')
+    print(" "*20, f"{linprog.objfunc.fname} ", "=", f"{linprog.objective_value():10.3f}", " "*20, end=' |\n')
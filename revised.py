@@ -0,0 +1,207 @@
+import numpy as np
+from sparse import CooMatrix
+
+
+"""
+Revised simplex engine
+
+Instead of rewriting the whole tableau on every pivot, only the original constraint matrix
+is kept together with a factorization of the current basis B:
+
+    - the basis is LU factored ( with partial pivoting ) every `refactor_every` pivots
+    - pivots in between are stored as eta vectors ( product form of the inverse )
+    - FTRAN solves B x = a and BTRAN solves y B = c using both of them
+
+The engine exposes the same small interface as `linprog.Tableau` so `LinearProgramming`
+can pick its pivots in exactly the same way with either of them.
+"""
+
+# values smaller than this are rounding noise of the solves, and are snapped to 0
+EPSILON = 1e-9
+
+
+class SingularBasisError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def lu_factor(B):
+    """Returns the LU factorization ( L and U packed in one matrix ) and the row permutation of `B`"""
+    LU = np.array(B, dtype=float)
+    size = len(LU)
+    perm = np.arange(size)
+    for k in range(size):
+        p = k + np.argmax(np.abs(LU[k:, k]))
+        if LU[p, k] == 0:
+            raise SingularBasisError(f"The basis matrix is singular at column {k}")
+        if p != k:
+            LU[[k, p]] = LU[[p, k]]
+            perm[[k, p]] = perm[[p, k]]
+        LU[k+1:, k] /= LU[k, k]
+        LU[k+1:, k+1:] -= np.outer(LU[k+1:, k], LU[k, k+1:])
+    return LU, perm
+
+
+def lu_solve(LU, perm, rhs, trans=False):
+    """Solves B x = rhs ( or x B = rhs when `trans` ) from the output of `lu_factor`"""
+    size = len(LU)
+    if not trans:
+        # L y = P rhs, then U x = y
+        x = np.array(rhs, dtype=float)[perm]
+        for i in range(1, size):
+            x[i] -= LU[i, :i] @ x[:i]
+        for i in range(size - 1, -1, -1):
+            x[i] = (x[i] - LU[i, i+1:] @ x[i+1:]) / LU[i, i]
+        return x
+    # U^T w = rhs, then L^T v = w, and x = P^T v
+    x = np.array(rhs, dtype=float)
+    for i in range(size):
+        x[i] = (x[i] - LU[:i, i] @ x[:i]) / LU[i, i]
+    for i in range(size - 2, -1, -1):
+        x[i] -= LU[i+1:, i] @ x[i+1:]
+    result = np.empty(size)
+    result[perm] = x
+    return result
+
+
+class BasisFactorization:
+    """LU factors of a basis matrix plus the eta file of the pivots done since they were computed"""
+
+    def __init__(self, B, refactor_every=50):
+        self.refactor_every = refactor_every
+        self.refactorizations = 0
+        self._lu = None
+        self._perm = None
+        self._etas = []
+        self.refactor(B)
+
+    def refactor(self, B):
+        """Factors `B` from scratch and clears the eta file"""
+        B = np.asarray(B, dtype=float)
+        if np.array_equal(B, np.eye(len(B))):
+            # the usual slack/artificial starting basis, nothing to factor
+            self._lu, self._perm = None, None
+        else:
+            self._lu, self._perm = lu_factor(B)
+        self._etas = []
+        self.refactorizations += 1
+
+    @property
+    def needs_refactor(self):
+        return len(self._etas) >= self.refactor_every
+
+    def ftran(self, a):
+        """Solves B x = a"""
+        x = np.array(a, dtype=float)
+        if self._lu is not None:
+            x = lu_solve(self._lu, self._perm, x)
+        for r, d in self._etas:
+            x = self._apply_eta(x, r, d)
+        return x
+
+    def btran(self, c):
+        """Solves y B = c"""
+        y = np.array(c, dtype=float)
+        for r, d in reversed(self._etas):
+            # only the r-th component changes for a row vector times E^-1
+            y[r] = (y[r] - (y @ d - y[r] * d[r])) / d[r]
+        if self._lu is not None:
+            y = lu_solve(self._lu, self._perm, y, trans=True)
+        return y
+
+    def update(self, r, d):
+        """Adds the pivot on row `r` with the FTRAN'ed entering column `d` to the eta file"""
+        self._etas.append((r, np.array(d, dtype=float)))
+
+    @staticmethod
+    def _apply_eta(x, r, d):
+        xr = x[r] / d[r]
+        x -= d * xr
+        x[r] = xr
+        return x
+
+
+class RevisedSimplex:
+    """Simplex engine working on the original constraint matrix and a factored basis"""
+
+    def __init__(self, A, b, refactor_every=50):
+        self._A0 = A if isinstance(A, CooMatrix) else CooMatrix.from_dense(A)
+        self._b0 = np.array(b, dtype=float)
+
+        # columns that are still part of the problem ( artificials get dropped after phase 1 )
+        self._ncols = self._A0.shape[1]
+
+        # column of `A0` in every basis position, -1 when it is still the starting unit column
+        self.basis = np.full(len(self._b0), -1)
+        self.factor = BasisFactorization(np.eye(len(self._b0)), refactor_every)
+
+        self.b = self._b0.copy()
+
+    @property
+    def A(self):
+        """The current tableau B^-1 A, only built on demand ( e.g. to show it )"""
+        return np.column_stack([self.column(j) for j in range(self._ncols)])
+
+    def column(self, j):
+        """Returns the column `j` of the current tableau ( FTRAN )"""
+        return _snap(self.factor.ftran(self._A0.column(j)))
+
+    def reduced_costs(self, cb, c):
+        """Calculates Cj-Zj by pricing every column against the simplex multipliers ( BTRAN )"""
+        y = self.factor.btran(cb)
+        return _snap(np.asarray(c, dtype=float) - self._A0.rmatvec(y)[:self._ncols])
+
+    def row(self, i):
+        """Returns the row `i` of the current tableau ( BTRAN of the unit vector )"""
+        unit = np.zeros(len(self._b0))
+        unit[i] = 1
+        return _snap(self._A0.rmatvec(self.factor.btran(unit))[:self._ncols])
+
+    def combine_rows(self, weights):
+        """Returns `weights` @ the current tableau ( one BTRAN )"""
+        return _snap(self._A0.rmatvec(self.factor.btran(weights))[:self._ncols])
+
+    def combine_columns(self, weights):
+        """Returns the current tableau @ `weights` ( one FTRAN )"""
+        full = np.zeros(self._A0.shape[1])
+        full[:self._ncols] = weights
+        return _snap(self.factor.ftran(self._A0.matvec(full)))
+
+    def row_sums(self, rows):
+        """Sums of the given rows of the current tableau"""
+        active = np.arange(self._A0.shape[1]) < self._ncols
+        sums = _snap(self.factor.ftran(self._A0.matvec(active)))
+        return [sums[row] for row in rows]
+
+    def pivot(self, pivrow, pivcol):
+        d = self.factor.ftran(self._A0.column(pivcol))
+        self.factor.update(pivrow, d)
+        self.basis[pivrow] = pivcol
+        if self.factor.needs_refactor:
+            self.factor.refactor(self._basis_matrix())
+            self.b = self.factor.ftran(self._b0)
+        else:
+            self.b = BasisFactorization._apply_eta(self.b, pivrow, d)
+        self.b = _snap(self.b)
+
+    def set_basis(self, columns):
+        """Factors the basis made of `columns` ( one per row ) from scratch"""
+        self.basis = np.array(columns)
+        self.factor.refactor(self._basis_matrix())
+        self.b = _snap(self.factor.ftran(self._b0))
+
+    def drop_columns(self, count):
+        """Drops the last `count` columns from the problem"""
+        self._ncols -= count
+
+    def _basis_matrix(self):
+        B = np.eye(len(self._b0))
+        basic = self.basis >= 0
+        for position in np.flatnonzero(basic):
+            B[:, position] = self._A0.column(self.basis[position])
+        return B
+
+
+def _snap(x):
+    x[np.abs(x) < EPSILON] = 0
+    return x
@@ -0,0 +1,132 @@
+import numpy as np
+
+
+"""
+Sensitivity analysis of an optimal simplex tableau
+
+Everything is read from the final tableau T = B^-1 A and b = B^-1 b0 in one pass, without solving
+perturbed copies of the problem:
+
+    - shadow prices        y = cB B^-1, the change of z per unit of a right-hand side
+    - reduced costs        Cj - cB B^-1 Aj of the written variables
+    - right-hand side ranges: b can move while B^-1 b stays >= 0
+    - objective coefficient ranges: cj can move while every Cj-Zj keeps its optimal sign
+"""
+
+# tableau cells smaller than this are treated as 0
+EPSILON = 1e-9
+
+
+class SensitivityReport:
+    """Shadow prices, reduced costs and allowable ranges of an optimal solution"""
+
+    def __init__(self, fname, constraints, shadow_prices, rhs_ranges, reduced_costs, cost_ranges):
+        self.fname = fname
+        # constraints strings as written
+        self.constraints = constraints
+        # change of the objective function per unit increase of every b, in constraints order
+        self.shadow_prices = shadow_prices
+        # (b, allowable decrease, allowable increase) of every constraint
+        self.rhs_ranges = rhs_ranges
+        # {variable: Cj-Zj} of the written variables, 0 for basic ones
+        self.reduced_costs = reduced_costs
+        # {variable: (cj, allowable decrease, allowable increase)}
+        self.cost_ranges = cost_ranges
+
+    def __str__(self):
+        lines = ["-"*25 + "SENSITIVITY" + "-"*25]
+        lines.append(f"{'Constraint':35} {'Shadow price':>12} {'b':>10} {'Decrease':>10} {'Increase':>10}")
+        for string, price, (b, down, up) in zip(self.constraints, self.shadow_prices, self.rhs_ranges):
+            lines.append(f"{string:35} {price:12.3f} {b:10.3f} {down:10.3f} {up:10.3f}")
+        lines.append(f"{'Variable':35} {'Cj-Zj':>12} {'Cj':>10} {'Decrease':>10} {'Increase':>10}")
+        for var, (c, down, up) in self.cost_ranges.items():
+            lines.append(f"{var:35} {self.reduced_costs[var]:12.3f} {c:10.3f} {down:10.3f} {up:10.3f}")
+        return "\n".join(lines)
+
+
+def row_factors(constraints, dual=False):
+    """
+    Returns a (rows of the solved model, number of constraints) matrix M so that b_rows = M @ b_written:
+    the standard form multiplies a constraint by its `sign`, the dual simplex form ( `Constraints.slack_form` )
+    also turns `>=` rows around and splits `=` rows in two.
+    """
+    factors = []
+    for k, c in enumerate(constraints.constraints):
+        directions = {'<=': (1,), '>=': (-1,)}.get(c.sense, (1, -1)) if dual else (1,)
+        factors.extend((k, direction * c.sign) for direction in directions)
+    M = np.zeros((len(factors), len(constraints.constraints)))
+    for i, (k, factor) in enumerate(factors):
+        M[i, k] = factor
+    return M
+
+
+def basis_of(T):
+    """Column of the unit vector of every row of the tableau `T`"""
+    top = np.abs(T).argmax(axis=0)
+    unit = np.isclose(T[top, np.arange(T.shape[1])], 1) & np.isclose(np.abs(T).sum(axis=0), 1)
+    basis = np.full(T.shape[0], -1)
+    # the first unit column of a row wins
+    for j in np.flatnonzero(unit)[::-1]:
+        basis[top[j]] = j
+    if (basis < 0).any():
+        raise ValueError("The tableau has no unit column for every row, it is not a simplex basis")
+    return basis
+
+
+def _ranges(values, directions):
+    """How far every `values` (m,) + t * directions (m, k) >= 0 holds for t < 0 and t > 0, by column"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = values[:, None] / np.abs(directions)
+    decrease = np.where(directions > EPSILON, ratio, np.inf).min(axis=0, initial=np.inf)
+    increase = np.where(directions < -EPSILON, ratio, np.inf).min(axis=0, initial=np.inf)
+    return np.maximum(decrease, 0), np.maximum(increase, 0)
+
+
+def analyze(A0, T, b, c, varnames, maximize, M, written_b, written_vars, fname="z", strings=None):
+    """
+    Sensitivity analysis of the optimal tableau `T` ( with right-hand sides `b` ) of a problem whose starting
+    matrix is `A0`, with objective coefficients `c` of `varnames` ( one per column of `T` ).
+    `M` maps the written right-hand sides `written_b` to the rows ( see `row_factors` ),
+    only the `written_vars` are reported ( not the slack and artificial variables ).
+    """
+    T = np.asarray(T, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n = T.shape[1]
+    # everything is done on the maximization form
+    sense = 1 if maximize else -1
+    c = sense * np.asarray(c, dtype=float)
+
+    basis = basis_of(T)
+    Binv = np.linalg.inv(np.asarray(A0, dtype=float)[:, basis])
+    y = c[basis] @ Binv
+    cj_zj = c - c[basis] @ T
+    cj_zj[basis] = 0
+    cj_zj[np.abs(cj_zj) < EPSILON] = 0
+    y[np.abs(y) < EPSILON] = 0
+
+    # right-hand sides: B^-1 b + t B^-1 M_k >= 0
+    decrease, increase = _ranges(b, Binv @ M)
+    rhs_ranges = list(zip(map(float, written_b), decrease.tolist(), increase.tolist()))
+    shadow_prices = (sense * (y @ M) + 0.0).tolist()
+
+    # objective coefficients: nonbasic columns may improve up to their Cj-Zj,
+    # basic ones change the Cj-Zj of every nonbasic column through their tableau row
+    nonbasic = np.setdiff1d(np.arange(n), basis)
+    up = np.where(np.isin(np.arange(n), nonbasic), -cj_zj, np.inf)
+    down = np.full(n, np.inf)
+    alpha = T[:, nonbasic]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = cj_zj[nonbasic] / alpha
+    up[basis] = np.where(alpha < -EPSILON, ratio, np.inf).min(axis=1, initial=np.inf)
+    down[basis] = np.where(alpha > EPSILON, -ratio, np.inf).min(axis=1, initial=np.inf)
+    up, down = np.maximum(up, 0), np.maximum(down, 0)
+    if not maximize:
+        up, down = down, up
+
+    reduced_costs, cost_ranges = {}, {}
+    for j, var in enumerate(varnames[:n]):
+        if var in written_vars:
+            reduced_costs[var] = float(sense * cj_zj[j]) + 0.0
+            cost_ranges[var] = (float(sense * c[j]), float(down[j]), float(up[j]))
+
+    return SensitivityReport(fname, strings or [], shadow_prices, rhs_ranges, reduced_costs, cost_ranges)
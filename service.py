@@ -0,0 +1,112 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from batch import _parse_problem
+from cache import fingerprint
+from linprog import LinearProgramming
+
+
+"""
+Solve linear programs from asyncio code without blocking the event loop
+
+    async with SolveService(workers=4) as service:
+        result = await service.solve("max z = 3x1 + 2x2", ["x1 + x2 <= 4", "x1 + 3x2 <= 6"])
+        print(result.status, result.z)
+
+    ( or `await service.aclose()` when it is not used as a context manager )
+
+    - solves run in a process pool, at most `max_in_flight` of them are submitted at once
+    - callers over that wait their turn, past `max_waiting` waiting callers `ServiceBusyError` is raised
+      right away, so the latency of the accepted requests does not grow with the queue
+    - identical problems solved at the same time ( same `cache.fingerprint` ) share one solve,
+      with a `cache.LRUCache` as `cache` the ones solved before are not solved again
+"""
+
+
+class ServiceBusyError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def _solve_job(job):
+    objfunc, constraints, engine, options = job
+    return LinearProgramming(objfunc, constraints).silent_calc(engine, **options)
+
+
+class SolveService:
+    """Process pool solving `LinearProgramming` problems for asyncio callers, see the module docstring"""
+
+    def __init__(self, workers=None, max_in_flight=None, max_waiting=None, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        # solves submitted to the pool at once, a couple per worker so none of them waits for work
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        # callers waiting for a free slot before new ones are turned away, None waits without limit
+        self.max_waiting = max_waiting
+        # `cache.LRUCache` of the results, None solves every request
+        self.cache = cache
+
+        self._executor = None
+        self._slots = None
+        # {fingerprint: task} of the problems being solved or waiting for a slot
+        self._in_flight = {}
+
+        # problems actually solved, and requests answered by the solve of an identical problem
+        self.solved = 0
+        self.coalesced = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """`close` for asyncio code, the event loop keeps running while the workers finish"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    def close(self):
+        """Waits for the running solves and stops the workers"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def solve(self, objfunc, constraints, engine="tableau", **options):
+        """
+        Solves one problem and returns its `linprog.SolveResult`, the objective and the constraints are
+        either parsed objects or strings ( see `batch.solve_many` ).
+        Errors raised by the solver are raised here, to every caller sharing the solve.
+        """
+        objfunc, constraints = _parse_problem((objfunc, constraints))
+        key = fingerprint(objfunc, constraints, engine, **options)
+        if self.cache is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.max_in_flight)
+            waiting = len(self._in_flight) - self.max_in_flight
+            if self.max_waiting is not None and waiting >= self.max_waiting:
+                raise ServiceBusyError(f"{waiting} requests are already waiting for a solver")
+            task = asyncio.ensure_future(self._run(key, (objfunc, constraints, engine, options)))
+            self._in_flight[key] = task
+        # a cancelled caller does not cancel the solve the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _run(self, key, job):
+        try:
+            async with self._slots:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, _solve_job, job)
+            self.solved += 1
+            if self.cache is not None:
+                self.cache.put(key, result)
+            return result
+        finally:
+            del self._in_flight[key]
@@ -0,0 +1,305 @@
+import json
+import os
+import numpy as np
+from linparse import ObjectiveFunction, Constraint, Constraints
+from linprog import LinearProgramming, Tableau, ENGINES
+from presolve import Postsolve
+from revised import RevisedSimplex
+from sparse import CooMatrix
+
+
+"""
+Binary snapshots of a model or of a simplex state in the middle ( or at the end ) of a solve
+
+A snapshot is a directory with a small `header.json` ( names, operators, basis, phase ... )
+and one `.npy` file per array. Loading memory-maps the arrays, nothing is parsed or copied:
+
+    save("model.snap", constraints)              # a `Constraints`
+    save("model.snap", (objfunc, constraints))   # a whole problem
+    save("model.snap", linprog)                  # a `LinearProgramming` and its tableau
+    linprog = load("model.snap")
+    linprog.calc(init=False)                     # carries on from the saved iteration
+"""
+
+FORMAT_VERSION = 1
+
+SENSES = ["<=", ">=", "="]
+
+
+class NotValidSnapshotError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def _save_arrays(path, arrays):
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+
+def _load_array(path, name, mmap_mode):
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+def _constraints_arrays(constraints, prefix=""):
+    """Sparse matrix and row layout of `constraints` as arrays"""
+    index = {var: j for j, var in enumerate(constraints.varnames)}
+    # the slack / artificial columns `to_standard` added to every row, -1 for none
+    extra = np.full((len(constraints.constraints), 2), -1, dtype=np.intp)
+    for i, c in enumerate(constraints.constraints):
+        added = c.varnames[c.structural:]
+        extra[i, :len(added)] = [ index[var] for var in added ]
+    return {
+        f"{prefix}rows": constraints.matrix.rows,
+        f"{prefix}cols": constraints.matrix.cols,
+        f"{prefix}vals": constraints.matrix.vals,
+        f"{prefix}b": np.asarray(constraints.b, dtype=float),
+        f"{prefix}extra": extra,
+        f"{prefix}signs": np.array(constraints.signs, dtype=np.int8),
+        f"{prefix}senses": np.array([ SENSES.index(c.sense) for c in constraints.constraints ], dtype=np.int8),
+    }
+
+
+def _restore_constraint(names, a, extra, sense, sign, b):
+    """Builds back a standard form `Constraint` from its matrix row, without parsing"""
+    constraint = Constraint()
+    structural = len(names) - len(extra)
+    # the constraint as written for `string`
+    constraint.varnames, constraint.a = names[:structural], [ sign * coef for coef in a[:structural] ]
+    constraint.op, constraint.b = sense, sign * b
+    constraint.string = str(constraint)
+
+    constraint.varnames, constraint.a, constraint.b = names, np.array(a), b
+    constraint.sign, constraint.sense, constraint.structural = sign, sense, structural
+    constraint.op = "="
+    if len(extra) == 2:
+        constraint.artificial = extra[1]
+    elif len(extra) == 1 and sense == "=":
+        constraint.artificial = extra[0]
+    elif len(extra) == 1:
+        constraint.slacks = extra[0]
+    return constraint
+
+
+def _load_constraints(path, varnames, mmap_mode, prefix=""):
+    rows, cols, vals = ( _load_array(path, f"{prefix}{name}", mmap_mode) for name in ("rows", "cols", "vals") )
+    b = _load_array(path, f"{prefix}b", None).tolist()
+    extra = _load_array(path, f"{prefix}extra", None)
+    signs = _load_array(path, f"{prefix}signs", None).tolist()
+    senses = _load_array(path, f"{prefix}senses", None).tolist()
+    matrix = CooMatrix(rows, cols, vals, (len(b), len(varnames)))
+
+    # cells of every row, by column
+    order = np.lexsort((cols, rows))
+    bounds = np.searchsorted(rows[order], np.arange(len(b) + 1))
+    constraints = []
+    for i in range(len(b)):
+        cells = order[bounds[i]:bounds[i+1]]
+        added = [ j for j in extra[i].tolist() if j >= 0 ]
+        columns = [ j for j in cols[cells].tolist() if j not in added ] + added
+        coefficients = dict(zip(cols[cells].tolist(), vals[cells].tolist()))
+        names = [ varnames[j] for j in columns ]
+        constraints.append(_restore_constraint(names, [ coefficients[j] for j in columns ],
+                                               [ varnames[j] for j in added ], SENSES[senses[i]], signs[i], b[i]))
+    return Constraints(list(varnames), constraints, matrix, b)
+
+
+def _objective_header(objfunc):
+    return {"optimize": objfunc.optimize, "fname": objfunc.fname, "varnames": objfunc.varnames, "z": objfunc.z}
+
+
+def _postsolve_header(postsolve):
+    return {"varnames": postsolve.varnames, "offset": float(postsolve.offset),
+            "stack": [ [reduction, item, None if value is None else float(value)] for reduction, item, value in postsolve.stack ]}
+
+
+def _restore_postsolve(header):
+    postsolve = Postsolve(header["varnames"])
+    for reduction, item, value in header["stack"]:
+        postsolve.push(reduction, item, value)
+        if reduction == "fix":
+            postsolve.fixed[item] = value
+    postsolve.offset = header["offset"]
+    return postsolve
+
+
+def _linprog_state(linprog):
+    """Header entries and arrays of the solver state of `linprog`"""
+    engine = linprog._engine
+    header = {
+        "varnames": linprog.varnames,
+        "cj": linprog.cj,
+        "working_cj": linprog._cj,
+        "vbs": [ linprog.vbs[0], [ float(c) for c in linprog.vbs[1] ] ],
+        "basic_columns": linprog._basis.tolist(),
+        "engine_basis": linprog._engine_basis.tolist(),
+        "opt": linprog.opt.__name__ if linprog.opt else None,
+        "saved_opt": linprog._opt.__name__ if linprog._opt else None,
+        "z": float(linprog.z),
+        "phase": linprog.phase,
+        "method": linprog.method,
+        "iterations": linprog.iterations,
+        "pivots": linprog._pivots,
+        "stalled": linprog._stalled,
+        "status": linprog.status,
+        "message": linprog.message,
+        "limits": [linprog.max_iterations, linprog.time_limit],
+        # the saved constraints are already shifted by the lower bounds
+        "bounds": {var: list(bound) for var, bound in linprog.bounds.items()},
+        "bound_offset": linprog._bound_offset,
+        "rhs": [ float(b) for b in linprog._rhs ],
+        # the saved problem is the presolved one, its solution is reported for the problem as written
+        "postsolve": _postsolve_header(linprog.postsolve) if linprog.postsolve is not None else None,
+        "presolve_status": linprog._presolve_status,
+        "tolerances": [ float(tolerance) for tolerance in (linprog._epsilon, linprog._cost_epsilon, linprog._pivot_epsilon) ],
+        "pivot": [ None if k is None else int(k) for k in (linprog._pivrow, linprog._pivcol) ],
+        "engine": linprog._engine_name if engine is not None else None,
+        "engine_options": linprog._engine_options,
+        "pricing": linprog._pricing.name,
+    }
+    arrays = {}
+    if linprog._pricing.weights is not None:
+        arrays["pricing_weights"] = linprog._pricing.weights
+    if linprog._upper is not None:
+        arrays.update({"upper": linprog._upper, "at_upper": linprog._at_upper})
+    if engine is None:
+        return header, arrays
+
+    if linprog.cj_zj is not None:
+        arrays["cj_zj"] = np.asarray(linprog.cj_zj, dtype=float)
+    if linprog._ratio_column is not None:
+        arrays["ratio"] = np.asarray(linprog._ratio_column, dtype=float)
+    if linprog._matrix is not linprog.constraints.matrix:
+        # the dual simplex starts from the slack form of the constraints
+        arrays.update({"start_rows": linprog._matrix.rows, "start_cols": linprog._matrix.cols,
+                       "start_vals": linprog._matrix.vals})
+        header["start_shape"] = list(linprog._matrix.shape)
+    if isinstance(engine, RevisedSimplex):
+        arrays.update({"start_b": engine._b0, "basis": engine.basis})
+        header["columns"] = engine._ncols
+    else:
+        # A with b as its last column
+        arrays["tableau"] = engine._tableau
+    return header, arrays
+
+
+def save(path, item):
+    """
+    Writes `item` to the snapshot directory `path`: a `Constraints`, an (ObjectiveFunction, Constraints) tuple
+    or a `LinearProgramming`, before or after ( part of ) its solve.
+    """
+    if isinstance(item, LinearProgramming):
+        kind, objfunc, constraints = "linprog", item.objfunc, item.constraints
+    elif isinstance(item, Constraints):
+        kind, objfunc, constraints = "constraints", None, item
+    elif isinstance(item, tuple) and len(item) == 2:
+        kind, (objfunc, constraints) = "problem", item
+    else:
+        raise TypeError(f"Can not save a snapshot of {type(item).__name__}")
+
+    os.makedirs(path, exist_ok=True)
+    header = {"version": FORMAT_VERSION, "kind": kind, "varnames": constraints.varnames}
+    arrays = _constraints_arrays(constraints)
+    if objfunc is not None:
+        header["objective"] = _objective_header(objfunc)
+    if kind == "linprog":
+        header["state"], state_arrays = _linprog_state(item)
+        arrays.update(state_arrays)
+
+    _save_arrays(path, arrays)
+    # the header goes last, a snapshot without it is incomplete
+    with open(os.path.join(path, "header.json"), "w") as file:
+        json.dump(header, file)
+
+
+def _restore_linprog(path, objfunc, constraints, state, mmap_mode):
+    max_iterations, time_limit = state["limits"]
+    linprog = LinearProgramming(objfunc, constraints, pricing=state["pricing"],
+                                max_iterations=max_iterations, time_limit=time_limit)
+    optimizers = {"max": max, "min": min, None: None}
+    if state["opt"]:
+        linprog._set_optimize(optimizers[state["opt"]])
+    linprog._opt = optimizers[state["saved_opt"]]
+
+    linprog.varnames = state["varnames"]
+    linprog.cj = state["cj"]
+    linprog.cjdict = {var: coef for var, coef in zip(*linprog.cj)}
+    linprog._cj = state["working_cj"]
+    linprog.vbs = state["vbs"]
+    linprog._basis = np.array(state["basic_columns"])
+    linprog._engine_basis = np.array(state["engine_basis"])
+    linprog.conlen = len(linprog.vbs[0])
+    linprog.z = state["z"]
+    linprog.phase, linprog.method, linprog.iterations = state["phase"], state["method"], state["iterations"]
+    linprog._pivots, linprog._stalled, linprog.status = state["pivots"], state["stalled"], state["status"]
+    linprog.message = state["message"]
+    linprog.bounds = {var: tuple(bound) for var, bound in state["bounds"].items()}
+    linprog._bound_offset = state["bound_offset"]
+    linprog._rhs = state["rhs"]
+    if state["postsolve"] is not None:
+        linprog.postsolve = _restore_postsolve(state["postsolve"])
+    if state["presolve_status"] is not None:
+        linprog._presolve_status = tuple(state["presolve_status"])
+    linprog._epsilon, linprog._cost_epsilon, linprog._pivot_epsilon = state["tolerances"]
+
+    name = state["engine"]
+    if name is None:
+        return linprog
+    files = set(os.listdir(path))
+    if "cj_zj.npy" in files:
+        linprog.cj_zj = _load_array(path, "cj_zj", None).tolist()
+    if "ratio.npy" in files:
+        linprog._ratio_column = _load_array(path, "ratio", None).tolist()
+    if "pricing_weights.npy" in files:
+        linprog._pricing.weights = _load_array(path, "pricing_weights", None)
+    if "upper.npy" in files:
+        linprog._upper = _load_array(path, "upper", None)
+        linprog._at_upper = np.array(_load_array(path, "at_upper", None))
+
+    linprog._matrix = constraints.matrix
+    if "start_shape" in state:
+        linprog._matrix = CooMatrix(*( _load_array(path, f"start_{part}", mmap_mode) for part in ("rows", "cols", "vals") ),
+                                    state["start_shape"])
+
+    if name == "revised":
+        engine = RevisedSimplex(linprog._matrix, _load_array(path, "start_b", None), **state["engine_options"])
+        basis = _load_array(path, "basis", None)
+        if (basis >= 0).any():
+            engine.set_basis(basis)
+        engine.drop_columns(linprog._matrix.shape[1] - state["columns"])
+    elif name == "tableau":
+        # `Tableau` pivots in place: mapped copy-on-write, the pages it writes are copied and the file is left as it is
+        engine = Tableau.from_tableau(_load_array(path, "tableau", "c" if mmap_mode else None))
+    else:
+        raise NotValidSnapshotError(f"Unknown simplex engine '{name}', expected one of {list(ENGINES)}")
+    linprog._engine, linprog._engine_name, linprog._engine_options = engine, name, state["engine_options"]
+
+    linprog._pivrow, linprog._pivcol = state["pivot"]
+    if linprog._pivcol is not None:
+        linprog._pivot_column = engine.column(linprog._pivcol)
+        linprog._pivot = linprog._pivot_column[linprog._pivrow] if linprog._pivrow is not None else None
+    return linprog
+
+
+def load(path, mmap_mode="r"):
+    """
+    Reads the snapshot directory `path` back, the arrays are memory-mapped with `mmap_mode`
+    ( see `numpy.load`, None reads them in memory ).
+    Returns a `Constraints`, an (ObjectiveFunction, Constraints) tuple or a `LinearProgramming`, like it was saved.
+    """
+    try:
+        with open(os.path.join(path, "header.json")) as file:
+            header = json.load(file)
+    except FileNotFoundError:
+        raise NotValidSnapshotError(f"{path} is not a snapshot ( no header.json )")
+    if header.get("version") != FORMAT_VERSION:
+        raise NotValidSnapshotError(f"Snapshot version {header.get('version')} is not supported")
+
+    constraints = _load_constraints(path, header["varnames"], mmap_mode)
+    if header["kind"] == "constraints":
+        return constraints
+
+    objective = header["objective"]
+    objfunc = ObjectiveFunction.from_terms(objective["optimize"], objective["fname"], objective["varnames"], objective["z"])
+    if header["kind"] == "problem":
+        return objfunc, constraints
+    return _restore_linprog(path, objfunc, constraints, header["state"], mmap_mode)
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+"""
+Minimal sparse matrix storage for the constraint coefficients
+
+Generated models are mostly zeros, so `Constraints` keeps only the nonzero cells as
+three arrays ( row index, column index, value ) and builds a dense matrix only when
+a dense engine asks for one.
+"""
+
+
+class CooMatrix:
+    """Sparse matrix in coordinate form ( row-index/col-index/value arrays )"""
+
+    def __init__(self, rows, cols, vals, shape):
+        self.rows = np.asarray(rows, dtype=np.intp)
+        self.cols = np.asarray(cols, dtype=np.intp)
+        self.vals = np.asarray(vals, dtype=float)
+        self.shape = tuple(shape)
+
+        # column compressed index, built the first time a column is asked for
+        self._csc = None
+
+    def __repr__(self):
+        return f"CooMatrix(shape={self.shape}, nnz={self.nnz})"
+
+    @classmethod
+    def from_dense(cls, a):
+        a = np.atleast_2d(np.asarray(a, dtype=float))
+        rows, cols = np.nonzero(a)
+        return cls(rows, cols, a[rows, cols], a.shape)
+
+    @staticmethod
+    def vstack(matrices, ncols):
+        """Stacks matrices that already share the same `ncols` columns on top of each other"""
+        offset = 0
+        rows, cols, vals = [], [], []
+        for matrix in matrices:
+            rows.append(matrix.rows + offset)
+            cols.append(matrix.cols)
+            vals.append(matrix.vals)
+            offset += matrix.shape[0]
+        return CooMatrix(np.concatenate(rows), np.concatenate(cols), np.concatenate(vals), (offset, ncols))
+
+    @property
+    def nnz(self):
+        return len(self.vals)
+
+    def toarray(self):
+        """Builds the dense matrix"""
+        dense = np.zeros(self.shape)
+        # `add` rather than assignment so duplicated cells are summed
+        np.add.at(dense, (self.rows, self.cols), self.vals)
+        return dense
+
+    def remap(self, columns, ncols):
+        """Returns a copy where column `j` becomes column `columns[j]` of a matrix with `ncols` columns"""
+        columns = np.asarray(columns, dtype=np.intp)
+        return CooMatrix(self.rows, columns[self.cols], self.vals, (self.shape[0], ncols))
+
+    def column(self, j):
+        """Returns the column `j` as a dense vector"""
+        if self._csc is None:
+            order = np.argsort(self.cols, kind="stable")
+            indptr = np.searchsorted(self.cols[order], np.arange(self.shape[1] + 1))
+            self._csc = (order, indptr)
+        order, indptr = self._csc
+        cells = order[indptr[j]:indptr[j+1]]
+        column = np.zeros(self.shape[0])
+        np.add.at(column, self.rows[cells], self.vals[cells])
+        return column
+
+    def matvec(self, x):
+        """A @ x"""
+        return np.bincount(self.rows, weights=self.vals * np.asarray(x)[self.cols], minlength=self.shape[0])
+
+    def rmatvec(self, y):
+        """y @ A"""
+        return np.bincount(self.cols, weights=self.vals * np.asarray(y)[self.rows], minlength=self.shape[1])
+
+    def unit_columns(self):
+        """Returns (column, row) of every column that has a single nonzero cell equal to 1, by column"""
+        counts = np.bincount(self.cols, minlength=self.shape[1])
+        ones = (self.vals == 1) & (counts[self.cols] == 1)
+        order = np.argsort(self.cols[ones], kind="stable")
+        return list(zip(self.cols[ones][order].tolist(), self.rows[ones][order].tolist()))
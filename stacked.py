@@ -0,0 +1,182 @@
+import numpy as np
+from linparse import Constraints
+
+
+"""
+Solve a batch of linear programs that share the same constraint structure
+
+All K problems ( scenarios ) have the same constraint matrix and only differ in their
+right-hand side `b` and/or their objective coefficients, so their tableaus are stacked
+in one (K, m, n + 1) array and every simplex iteration pivots all the unfinished ones
+in a single vectorized step:
+
+    - entering column: most extreme Cj-Zj ( Dantzig ), the first one on ties
+    - leaving row: minimum ratio, the row with the smallest row sum on ties
+    - problems that are optimal ( or unbounded ) are masked out of the next iterations
+"""
+
+# reduced costs and pivot cells smaller than this are treated as 0
+EPSILON = 1e-9
+
+OPTIMAL = "optimal"
+INFEASIBLE = "infeasible"
+UNBOUNDED = "unbounded"
+ITERATION_LIMIT = "iteration_limit"
+
+
+class StackedSolution:
+    """Solutions of all the stacked problems, row `k` of every array belongs to the problem `k`"""
+
+    def __init__(self, varnames, status, z, values, basis, iterations):
+        self.varnames = varnames
+        # one of OPTIMAL, INFEASIBLE, UNBOUNDED or ITERATION_LIMIT per problem
+        self.status = status
+        # objective value (K,)
+        self.z = z
+        # value of every variable of `varnames` (K, n)
+        self.values = values
+        # column of the basic variable of every row (K, m)
+        self.basis = basis
+        self.iterations = iterations
+
+    def __len__(self):
+        return len(self.status)
+
+    def vbs(self, k):
+        """Basic variables names of the problem `k`"""
+        return [ self.varnames[j] for j in self.basis[k] ]
+
+
+def _simplex(T, basis, cost, active, enterable, max_iterations, pinned=None):
+    """
+    Maximizes `cost` on every problem of `T` flagged in `active`, in place.
+    Basic variables flagged in `pinned` ( by column ) must stay at 0 and leave the basis first.
+    Returns the status and the number of iterations of every problem.
+    """
+    K, m, n1 = T.shape
+    n = n1 - 1
+    status = np.full(K, OPTIMAL, dtype=object)
+    iterations = np.zeros(K, dtype=int)
+    active = active.copy()
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        span = np.arange(len(idx))
+        tableaus = T[idx]
+
+        # Cj - Zj of every problem at once
+        cb = np.take_along_axis(cost[idx], basis[idx], axis=1)
+        cj_zj = cost[idx] - np.einsum("km,kmn->kn", cb, tableaus[:, :, :n])
+        cj_zj[:, ~enterable] = -np.inf
+        pivcol = cj_zj.argmax(axis=1)
+        optimal = cj_zj[span, pivcol] <= EPSILON
+
+        # ratio test on the entering columns
+        column = tableaus[span, :, pivcol]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(column > EPSILON, tableaus[:, :, n] / column, np.inf)
+        if pinned is not None:
+            ratio[pinned[basis[idx]] & (np.abs(column) > EPSILON)] = 0
+        minimum = ratio.min(axis=1)
+        ties = ratio == minimum[:, None]
+        row_sums = np.where(ties, tableaus[:, :, :n].sum(axis=2), np.inf)
+        pivrow = row_sums.argmin(axis=1)
+        unbounded = ~optimal & np.isinf(minimum)
+
+        limited = iterations[idx] >= max_iterations
+        status[idx[unbounded]] = UNBOUNDED
+        status[idx[limited & ~optimal & ~unbounded]] = ITERATION_LIMIT
+        go = ~optimal & ~unbounded & ~limited
+        active[idx[~go]] = False
+        if not go.any():
+            break
+
+        # pivot every unfinished problem in one step
+        targets, pivrow, pivcol, column = idx[go], pivrow[go], pivcol[go], column[go]
+        rows = T[targets, pivrow] / T[targets, pivrow, pivcol][:, None]
+        T[targets] -= column[:, :, None] * rows[:, None, :]
+        T[targets, pivrow] = rows
+        basis[targets, pivrow] = pivcol
+        iterations[targets] += 1
+
+    return status, iterations
+
+
+def solve_stacked(objfunc, constraints, b=None, c=None, max_iterations=None):
+    """
+    Solves K variants of the problem ( `objfunc`, `constraints` ) together.
+    `b` is an array (K, number of constraints) of right-hand sides, written like in the constraints strings,
+    `c` is an array (K, len(objfunc.varnames)) of objective coefficients in `objfunc.varnames` order.
+    Either of them can be left out to keep the original values for every problem.
+    """
+    if not isinstance(constraints, Constraints):
+        constraints = Constraints.from_iterable([constraints])
+
+    varnames = list(constraints.varnames)
+    A = constraints.a
+    m, n = A.shape
+
+    missing = set(objfunc.varnames) - set(varnames)
+    if missing:
+        raise ValueError(f"Objective function variables {sorted(missing)} are not in any constraint")
+
+    signs = np.array(constraints.signs, dtype=float)
+    if b is None:
+        b = np.array(constraints.b, dtype=float)[None, :]
+    else:
+        # same orientation as the standard form of the constraints
+        b = np.atleast_2d(np.asarray(b, dtype=float)) * signs
+        if (b < 0).any():
+            raise ValueError("A right-hand side changes the standard form of its constraint, solve it separately")
+
+    columns = [ varnames.index(var) for var in objfunc.varnames ]
+    if c is None:
+        c = np.array(objfunc.z, dtype=float)[None, :]
+    c = np.atleast_2d(np.asarray(c, dtype=float))
+
+    K = max(len(b), len(c))
+    b = np.broadcast_to(b, (K, m))
+    cost = np.zeros((K, n))
+    cost[:, columns] = c
+    if objfunc.optimize.startswith("min"):
+        cost = -cost
+
+    # starting basis: the slack and artificial unit columns
+    start = np.full(m, -1)
+    for j, row in constraints.matrix.unit_columns():
+        start[row] = j
+    if (start < 0).any():
+        raise ValueError("Every constraint needs a slack or an artificial variable to start from")
+
+    T = np.empty((K, m, n + 1))
+    T[:, :, :n] = A
+    T[:, :, n] = b
+    basis = np.tile(start, (K, 1))
+    if max_iterations is None:
+        max_iterations = 50 * (m + n)
+
+    active = np.ones(K, dtype=bool)
+    artificial = np.isin(varnames, constraints.artificials)
+    iterations = np.zeros(K, dtype=int)
+    status = np.full(K, OPTIMAL, dtype=object)
+
+    if artificial.any():
+        # phase 1: maximize -sum(artificials)
+        phase1_cost = np.tile(np.where(artificial, -1.0, 0.0), (K, 1))
+        status, iterations = _simplex(T, basis, phase1_cost, active, np.ones(n, dtype=bool), max_iterations)
+        infeasibility = np.where(artificial[basis], T[:, :, n], 0).sum(axis=1)
+        status[(status == OPTIMAL) & (infeasibility > EPSILON)] = INFEASIBLE
+        active = status == OPTIMAL
+
+    # phase 2: artificial columns can not enter the basis again
+    phase2_status, phase2_iterations = _simplex(T, basis, cost, active, ~artificial, max_iterations, pinned=artificial)
+    status[active] = phase2_status[active]
+    iterations += phase2_iterations
+
+    values = np.zeros((K, n))
+    np.put_along_axis(values, basis, T[:, :, n], axis=1)
+    z = np.einsum("kn,kn->k", cost, values)
+    if objfunc.optimize.startswith("min"):
+        z = -z
+
+    return StackedSolution(varnames, status, z, values, basis, iterations)
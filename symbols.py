@@ -0,0 +1,83 @@
+import re
+import threading
+import numpy as np
+from utils import sorter1
+
+
+"""
+One table of dense integer ids for every variable name
+
+Models keep their columns as arrays of ids: merging or ordering variables works on ints,
+the sort key of a name is computed once when it is first seen, and names are only looked up
+again to show results.
+
+Slack and artificial names ( every model brings new ones ) are not kept in the table, their id
+is a negative number computed from the name, so the table only grows with the written variables.
+"""
+
+
+# names of the generated slack ( s, e ) and artificial ( A, a ) variables, see `linparse.Naming`
+GENERATED = re.compile(r"([seAa])([1-9][0-9]*)")
+PREFIXES = "seAa"
+
+
+class SymbolTable:
+    """Maps variable names to dense integer ids ( in order of first appearance ) and back"""
+
+    def __init__(self):
+        self._ids = {}
+        # name and sort key of every id
+        self.names = []
+        self._keys = []
+        # new names are added under the lock, models can be parsed from several threads
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def id(self, name):
+        """Returns the id of `name`, a new one the first time it is seen"""
+        symbol = self._ids.get(name)
+        if symbol is None:
+            match = GENERATED.fullmatch(name)
+            if match:
+                return -1 - 4 * int(match.group(2)) - PREFIXES.index(match.group(1))
+            with self._lock:
+                symbol = self._ids.get(name)
+                if symbol is None:
+                    self.names.append(name)
+                    self._keys.append(sorter1(name))
+                    symbol = self._ids[name] = len(self.names) - 1
+        return symbol
+
+    def ids(self, names):
+        """Ids of `names` as an int array"""
+        return np.array(list(map(self.id, names)), dtype=np.intp)
+
+    def name(self, symbol):
+        if symbol >= 0:
+            return self.names[symbol]
+        number, prefix = divmod(-1 - symbol, 4)
+        return f"{PREFIXES[prefix]}{number}"
+
+    def key(self, symbol):
+        return self._keys[symbol] if symbol >= 0 else sorter1(self.name(symbol))
+
+    def lookup(self, ids):
+        """Names of `ids`"""
+        return [ self.name(symbol) for symbol in ids ]
+
+    def sort(self, ids):
+        """Sorts `ids` in variable order ( see `utils.sorter1` ) with the keys computed once per written name"""
+        return np.array(sorted(ids, key=self.key), dtype=np.intp)
+
+    def ordered(self, names):
+        """Sorts the variable `names` in variable order"""
+        return self.lookup(self.sort(self.ids(names)))
+
+
+# the table every model shares, so their ids can be compared directly
+SYMBOLS = SymbolTable()
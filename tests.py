@@ -1,5 +1,22 @@
-from linparse import Constraint, ObjectiveFunction
-from linprog import LinearProgramming
+from linparse import Constraint, Constraints, ObjectiveFunction, NotValidObjectiveFunctionError, NotValidConstraintError, naming, PARSED
+import numpy as np
+from linprog import LinearProgramming, pivot_tableau, ratio_test, Tableau
+from batch import solve_many
+from stacked import solve_stacked
+from presolve import run_presolve, InfeasibleError, UnboundedError
+import pytest
+import gzip
+from lpfile import read_model, NotValidModelFileError
+from snapshot import save, load
+from symbols import SYMBOLS
+from pricing import PRICING_RULES
+from profiling import Profile, active
+import json
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from service import SolveService, ServiceBusyError, fingerprint
+from cache import LRUCache, cached_solve
 
 
 def test1():
@@ -95,3 +112,628 @@ def test7():
     linprog.calc()
 
 
+
+
+def test_pivot_tableau():
+    tableau = np.array([[2., 1., 1., 0., 8.],
+                        [1., 3., 0., 1., 9.]])
+    pivot_tableau(tableau, 0, 0)
+    expected = np.array([[1., 0.5, 0.5, 0., 4.],
+                         [0., 2.5, -0.5, 1., 5.]])
+    assert np.allclose(tableau, expected)
+
+
+def test_revised_engine():
+    problems = [
+        (ObjectiveFunction("max Z = 24x1 + 20 x2"), Constraint("x1 + x2 <= 30") + Constraint("x1 + 2 x2 >= 40")),
+        (ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4"),
+         Constraint("2x1 + 4x2 + 2x3 + 3 x4 <= 450") + Constraint("x1 + x2 <= 60") + Constraint("x3 + x4 <= 70")
+         + Constraint("x1 + x3 <= 50") + Constraint("x2 + x4 <= 60")),
+        (ObjectiveFunction("min z = 45x1 + 54x2 + 42x3 + 36x4"),
+         Constraint("x1 + x2 + x3 + x4 = 1600") + Constraint("30x1 + 60x2 + 70x3 + 80x4 = 100000")
+         + Constraint("30x1 + 40x2 + 20x4 = 30000")),
+    ]
+    for objfunc, constraints in problems:
+        tableau = LinearProgramming(objfunc, constraints)
+        tableau.silent_calc()
+        # refactorize often so both the LU solves and the eta file are exercised
+        revised = LinearProgramming(objfunc, constraints)
+        revised.silent_calc(engine="revised", refactor_every=2)
+
+        assert revised.vbs[0] == tableau.vbs[0]
+        assert np.allclose(revised.b, tableau.b)
+        assert np.isclose(revised.z, tableau.z)
+
+
+def test_objective_only_variables():
+    rows = ["x1 + x2 <= 4", "x1 + 3x2 <= 6"]
+    # x3 is in no constraint: a zero column, it grows without limit when it improves the objective
+    for engine in ("tableau", "revised"):
+        for method in ("primal", "dual"):
+            for z, status, value in (("max z = 3x1 + 2x2 + x3", "unbounded", None), ("max z = 3x1 - x3", "optimal", 12),
+                                     ("min z = 3x1 + 2x2 + x3", "optimal", 0)):
+                linprog = LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows))
+                result = linprog.silent_calc(engine, method=method)
+                assert result.status == status
+                if value is not None:
+                    assert np.isclose(result.z, value) and linprog.values()["x3"] == 0
+
+    # the costs follow the variable names, x2 has none
+    linprog = LinearProgramming(ObjectiveFunction("max z = 3x1 + x3"), Constraints.from_iterable(["x1 + x2 <= 4", "x2 + x3 <= 6"]))
+    linprog.silent_calc()
+    assert linprog.values() == {"x1": 4, "x2": 0, "x3": 6} and linprog.objective_value() == 18
+
+
+def test_sparse_constraints():
+    c = Constraint("4x1 + 5x2 <= 4") + Constraint("14x3 - x4 <= 3") + Constraint("x2 + x4 >= 5")
+    # 2 + 1 slacks, 2 + 1 slacks, 2 + 1 surplus + 1 artificial
+    assert c.matrix.nnz == 10
+    assert c.shape == (3, len(c.varnames))
+    dense = c.a
+    assert np.count_nonzero(dense) == 10
+    assert dense[0, c.varnames.index("x2")] == 5 and dense[1, c.varnames.index("x4")] == -1
+
+
+def test_constraints_from_iterable():
+    rows = ["4x1 + 5x2 + x3 + 0.05x4 <= 4", "14x3 + 12x2 - x4 <= 3", "3x2 + 2 x3 + x4 >= 5", "-x2 + 5x3 <= -1"]
+    chained = Constraint(rows[0]) + Constraint(rows[1]) + Constraint(rows[2]) + Constraint(rows[3])
+    built = Constraints.from_iterable(row for row in rows)
+
+    assert built.b == chained.b
+    assert len(built.artificials) == len(chained.artificials) and len(built.slacks) == len(chained.slacks)
+    # same cells for the original variables, whatever the column order is
+    for var in ("x1", "x2", "x3", "x4"):
+        assert np.array_equal(built.a[:, built.varnames.index(var)], chained.a[:, chained.varnames.index(var)])
+
+
+def test_solve_many():
+    problems = [
+        ("max Z = 24x1 + 20 x2", ["x1 + x2 <= 30", "x1 + 2 x2 >= 40"]),
+        ("max f = 5x1 + 6x2", ["x1 + x2 <= 10", "5x1 + 4x2 <= 35"]),
+        ("max f = x1 + x2", ["x1 + x2 <= 10", "x1 + x2 >= 20"]),
+        ("max f = x1 + x2", ["x1 + x2 <> 10"]),
+    ] * 3
+    results = solve_many(problems, workers=2)
+
+    assert [ result.index for result in results ] == list(range(len(problems)))
+    assert [ result.status for result in results[:4] ] == ["optimal", "optimal", "infeasible", "error"]
+    assert np.isclose(results[0].z, 680) and np.isclose(results[1].z, 52.5)
+    assert "NotValidConstraintError" in results[3].error
+    assert results.throughput > 0
+
+
+def test_solve_stacked():
+    z = ObjectiveFunction("max Z = 24x1 + 20 x2")
+    c = Constraints.from_iterable(["x1 + x2 <= 30", "x1 + 2 x2 >= 40"])
+    solution = solve_stacked(z, c, b=[[30, 40], [30, 50], [30, 70]], c=[[24, 20], [1, 5], [1, 1]])
+
+    assert list(solution.status) == ["optimal", "optimal", "infeasible"]
+    assert np.allclose(solution.z[:2], [680, 150])
+    assert solution.vbs(0) == ["x1", "x2"]
+    assert np.allclose(solution.values[0, :2], [20, 10])
+
+
+def test_resolve():
+    z = ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4")
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+    linprog.silent_calc()
+    assert np.isclose(linprog.z, 600)
+
+    # x4 gets squeezed: the old basis is not primal feasible anymore ( dual simplex )
+    linprog.resolve(new_b={2: 20})
+    assert np.isclose(linprog.z, 480)
+
+    # x4 gets more attractive: the old basis is not optimal anymore ( primal simplex )
+    linprog.resolve(new_b={2: 70}, new_c={"x4": 40})
+    assert np.isclose(linprog.z, 2750)
+    assert dict(zip(linprog.vbs[0], linprog.b))["x4"] == 60
+    # earlier changes are kept
+    result = linprog.resolve(new_c={"x4": 4})
+    assert result.status == "optimal" and np.isclose(result.z, 600)
+
+    # no solution is a status on both paths, from the old basis and from scratch ( nothing solved yet )
+    for solved in (True, False):
+        linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+        if solved:
+            linprog.silent_calc()
+        result = linprog.resolve(new_b={1: -10})
+        assert result.status == linprog.status == "infeasible" and result.message
+        result = linprog.resolve(new_b={1: 60})
+        assert result.status == "optimal" and np.isclose(result.z, 600)
+
+
+def test_dual_simplex():
+    z = ObjectiveFunction("min f = 100x1 + 50x2 + 200x3")
+    rows = ["x1 + x2 + x3 = 3000", "8x1 + 14x2 + 10x3 <= 42000", "10x1 + 12x2 + 6x3 <= 24000",
+            "30x1 + 20x2 + 30x3 >= 75000", "10x1 + 10x2 + 15x3 >= 36000"]
+    for engine in ("tableau", "revised"):
+        linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+        linprog.silent_calc(engine=engine, method="dual")
+        assert linprog.method == "dual" and linprog.phase == 0
+        assert np.isclose(linprog.z, 450000)
+        assert min(linprog.b) >= 0
+
+    # the slack basis is not dual feasible here, the two-phase primal simplex is used
+    linprog = LinearProgramming(ObjectiveFunction("max f = 5x1 + 6x2"), Constraint("x1 + x2 <= 10") + Constraint("5x1 + 4x2 <= 35"))
+    linprog.silent_calc(method="dual")
+    assert linprog.method == "primal"
+
+
+def test_presolve():
+    z = ObjectiveFunction("max z = 3x1 + 2x2 + 4x3 - x4")
+    rows = ["x1 + x2 + x3 <= 10", "x3 = 2", "2x1 + 2x2 + 2x3 <= 30", "x1 <= 4", "x1 >= -3", "x4 <= 5"]
+    objfunc, constraints, postsolve = run_presolve(z, Constraints.from_iterable(rows))
+    # x3 is fixed and substituted, x1 >= -3 is redundant and the third row is the first one scaled
+    assert len(constraints.constraints) == 3
+    assert postsolve.fixed == {"x3": 2.0} and postsolve.offset == 8
+
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows), presolve=True)
+    linprog.silent_calc()
+    assert linprog.values() == {"x1": 4, "x2": 4, "x3": 2, "x4": 0}
+    assert linprog.objective_value() == 28
+
+    # the tighter duplicate comes second, at another scale
+    total = ObjectiveFunction("max z = x1 + x2")
+    for rows in (["x1 + x2 + x3 <= 10", "2x1 + 2x2 + 2x3 <= 16"], ["2x1 + 2x2 + 2x3 <= 20", "x1 + x2 + x3 <= 8"],
+                 ["x1 + x2 >= 1", "3x1 + 3x2 >= 6", "x1 + x2 <= 12"]):
+        plain, presolved = (LinearProgramming(total, Constraints.from_iterable(rows), presolve=flag) for flag in (False, True))
+        plain.silent_calc()
+        presolved.silent_calc()
+        assert np.isclose(presolved.objective_value(), plain.objective_value())
+
+    with pytest.raises(InfeasibleError):
+        run_presolve(z, Constraints.from_iterable(["x1 + x2 <= 4", "x1 >= 5", "x1 <= 3"]))
+    with pytest.raises(UnboundedError):
+        run_presolve(z, Constraints.from_iterable(["x1 + x2 <= 4"]))
+    # a solve reports what presolve proved instead of raising it
+    for rows, status in ((["x1 + x2 <= 4", "x1 >= 5", "x1 <= 3"], "infeasible"), (["x1 + x2 <= 4"], "unbounded")):
+        for engine in ("tableau", "revised"):
+            result = LinearProgramming(z, Constraints.from_iterable(rows), presolve=True).silent_calc(engine)
+            assert result.status == status and result.message
+
+
+def test_sensitivity():
+    linprog = LinearProgramming(ObjectiveFunction("max z = 3x1 + 5x2"),
+                                Constraints.from_iterable(["x1 <= 4", "2x2 <= 12", "3x1 + 2x2 <= 18"]))
+    linprog.silent_calc()
+    report = linprog.sensitivity()
+    assert np.allclose(report.shadow_prices, [0, 1.5, 1])
+    assert np.allclose(report.rhs_ranges, [(4, 2, np.inf), (12, 6, 6), (18, 6, 6)])
+    assert report.reduced_costs == {"x1": 0, "x2": 0}
+    assert np.allclose(report.cost_ranges["x1"], (3, 3, 4.5))
+    assert np.allclose(report.cost_ranges["x2"], (5, 3, np.inf))
+
+    # same report from the dual simplex, whose rows are written differently
+    z = ObjectiveFunction("min f = 100x1 + 50x2 + 200x3")
+    rows = ["x1 + x2 + x3 = 3000", "8x1 + 14x2 + 10x3 <= 42000", "10x1 + 12x2 + 6x3 <= 24000",
+            "30x1 + 20x2 + 30x3 >= 75000", "10x1 + 10x2 + 15x3 >= 36000"]
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+    linprog.silent_calc(method="dual")
+    report = linprog.sensitivity()
+    assert np.allclose(report.shadow_prices, [350, 0, -25, 0, 0])
+    assert np.allclose(report.rhs_ranges[0], (3000, 200 / 3, 1000))
+
+
+def test_linear_scanner():
+    objfunc = ObjectiveFunction("max z = 2x1 - x2 + .5x1 + x3 - 3 x1")
+    assert objfunc.varnames == ["x1", "x2", "x3"]
+    assert objfunc.z == [-0.5, -1, 1]
+    constraint = Constraint(" -x1 + 2.5x2 - x2 <= 4")
+    assert constraint.varnames[:constraint.structural] == ["x1", "x2"]
+    assert list(constraint.a[:constraint.structural]) == [-1, 1.5]
+
+    for string in ("max z = 3x1 + + x2", "max z = 3x1 2x2", "max z = ", "max z = x1 +"):
+        with pytest.raises(NotValidObjectiveFunctionError):
+            ObjectiveFunction(string)
+    with pytest.raises(NotValidConstraintError):
+        Constraint("x1 + x2 <= four")
+
+
+def test_read_model(tmp_path):
+    lp = tmp_path / "model.lp.gz"
+    with gzip.open(lp, "wt") as file:
+        file.write("max z = 3x1 + 2x2\n# comment\n\nx1 + x2 <= 4\nx1 + 3x2 <= 6\nx2 >= 1\n")
+    mps = tmp_path / "model.mps"
+    mps.write_text("NAME TEST\nOBJSENSE\n    MAX\nROWS\n N  z\n L  c1\n L  c2\n G  c3\nCOLUMNS\n"
+                   "    x1  z  3  c1  1\n    x1  c2  1\n    x2  z  2  c1  1\n    x2  c2  3  c3  1\n"
+                   "RHS\n    RHS  c1  4  c2  6\n    RHS  c3  1\nENDATA\n")
+
+    for path in (lp, mps):
+        objfunc, constraints = read_model(path)
+        assert objfunc.optimize == "max" and objfunc.var2ceof == {"x1": 3, "x2": 2}
+        assert constraints.b == [4, 6, 1]
+        assert np.array_equal(constraints.a[:, :2], [[1, 1], [1, 3], [0, 1]])
+
+    bad = tmp_path / "bad.lp"
+    bad.write_text("max z = x1\nx1 <= \n")
+    with pytest.raises(NotValidConstraintError, match="line 2"):
+        read_model(bad)
+    bad = tmp_path / "bad.mps"
+    bad.write_text("ROWS\n N  obj\n L  c1\nCOLUMNS\n    x1  obj  1  c1  abc\nENDATA\n")
+    with pytest.raises(NotValidModelFileError, match="line 5: 'abc' is not a number"):
+        read_model(bad)
+    bad.write_text("ROWS\n N  obj\n L  c1\nCOLUMNS\n    x1  obj  1  c1  1\nRHS\n    RHS  c1  4  obj  -10\nENDATA\n")
+    with pytest.raises(NotValidModelFileError, match="line 7: constant 10.0 of the objective row"):
+        read_model(bad)
+
+
+def test_snapshot(tmp_path):
+    z = ObjectiveFunction("min f = 100x1 + 50x2 + 200x3")
+    rows = ["x1 + x2 + x3 = 3000", "8x1 + 14x2 + 10x3 <= 42000", "10x1 + 12x2 + 6x3 <= 24000",
+            "30x1 + 20x2 + 30x3 >= 75000", "10x1 + 10x2 + 15x3 >= 36000", "x1 - x2 <= -5"]
+    constraints = Constraints.from_iterable(rows)
+    save(tmp_path / "model", (z, constraints))
+    objfunc, loaded = load(tmp_path / "model")
+    assert objfunc.var2ceof == z.var2ceof
+    assert loaded.varnames == constraints.varnames and loaded.b == constraints.b
+    assert np.array_equal(loaded.a, constraints.a)
+    assert loaded.slacks == constraints.slacks and loaded.artificials == constraints.artificials
+    assert [ c.string for c in loaded.constraints ][-1] == "+1.0 x1 -1.0 x2 <= -5.0"
+
+    # stop after two iterations and carry on from the snapshot
+    linprog = LinearProgramming(z, constraints)
+    linprog.init_mat()
+    linprog.next_iter()
+    linprog.next_iter()
+    save(tmp_path / "state", linprog)
+    resumed = load(tmp_path / "state")
+    assert isinstance(resumed._engine.A, np.memmap)
+    resumed.calc(verbose=False, init=False, show_result=False)
+    linprog.calc(verbose=False, init=False, show_result=False)
+    assert resumed.vbs == linprog.vbs and resumed.iterations == linprog.iterations
+    assert np.isclose(resumed.z, linprog.z)
+
+    # a presolved model keeps its reductions, x3 is fixed and gives 2 of z
+    z = ObjectiveFunction("max z = 3x1 + 2x2 + x3")
+    rows = ["x1 + x2 + x3 <= 10", "x3 = 2", "x1 <= 4"]
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows), presolve=True)
+    linprog.init_mat(dtype="float32")
+    save(tmp_path / "presolved", linprog)
+    resumed = load(tmp_path / "presolved")
+    assert (resumed._epsilon, resumed._cost_epsilon, resumed._pivot_epsilon) == (linprog._epsilon, linprog._cost_epsilon, linprog._pivot_epsilon)
+    for item in (linprog, resumed):
+        item.calc(verbose=False, init=False, show_result=False)
+        assert item.objective_value() == 22 and item.values() == {"x1": 4, "x2": 4, "x3": 2}
+    save(tmp_path / "presolved", linprog)
+    assert load(tmp_path / "presolved").result().z == 22
+
+
+def test_symbol_order():
+    assert SYMBOLS.ordered(["e12", "x10", "A1", "x2", "e3", "x1"]) == ["x1", "x2", "x10", "e3", "e12", "A1"]
+    assert SYMBOLS.id("x10") == SYMBOLS.id("x10")
+    # generated names are not kept, new models of the same variables do not grow the table
+    assert SYMBOLS.lookup(SYMBOLS.ids(["s1", "e12", "A3", "a40", "s01"])) == ["s1", "e12", "A3", "a40", "s01"]
+    Constraints.from_iterable(["x1 + x2 <= 4", "x1 - x2 >= 1", "x2 = 1"])
+    size = len(SYMBOLS)
+    for _ in range(5):
+        LinearProgramming(ObjectiveFunction("max z = x1 + x2"), Constraints.from_iterable(["x1 + x2 <= 4", "x1 - x2 >= 1", "x2 = 1"])).silent_calc()
+    assert len(SYMBOLS) == size and "s1" not in SYMBOLS
+
+    rows = [ f"x{i} + x{i + 1} <= {i}" for i in range(1, 12) ]
+    constraints = Constraints.from_iterable(rows)
+    assert constraints.varnames[:12] == [ f"x{i}" for i in range(1, 13) ]
+    assert np.array_equal(constraints.ids, SYMBOLS.ids(constraints.varnames))
+    chained = Constraint(rows[0])
+    for row in rows[1:]:
+        chained = chained + Constraint(row)
+    assert np.array_equal(chained.a[:, :12], constraints.a[:, :12])
+
+
+def test_vectorized_pivoting():
+    column, b = np.array([2., 0., -1., 4., -2.]), np.array([4., 3., 2., 4., -6.])
+    assert ratio_test(column, b).tolist() == [2., np.inf, np.inf, 1., 3.]
+    # every candidate column at once
+    assert ratio_test(np.column_stack([column, -column]), b)[:, 1].tolist() == [np.inf, np.inf, 2., np.inf, np.inf]
+
+    tableau = Tableau(np.array([[1., 0.1, 0.2], [0.3, 1., 0.7]]), np.array([1., 2.]))
+    cb, c = [0.1, 0.7], [1., 2., 3.]
+    # same sums, in the same order, as the column by column loop
+    loop = [ 0 - cb[0] * tableau.A[0, j] - cb[1] * tableau.A[1, j] + c[j] for j in range(3) ]
+    assert tableau.reduced_costs(cb, c).tolist() == loop
+
+    # equal Cj-Zj, the smaller ratio wins and equal ratios go to the smaller row sum
+    z = ObjectiveFunction("max z = 2x1 + 2x2")
+    linprog = LinearProgramming(z, Constraints.from_iterable(["x1 + 2x2 <= 4", "3x1 + x2 <= 6"]))
+    linprog.init_mat()
+    linprog._get_pivot()
+    assert (linprog._pivrow, linprog._pivcol) == (1, 0)
+
+
+def test_pricing_rules():
+    z = ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4")
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+    for engine in ("tableau", "revised"):
+        for rule in PRICING_RULES:
+            linprog = LinearProgramming(z, Constraints.from_iterable(rows), pricing=rule)
+            linprog.silent_calc(engine)
+            assert np.isclose(linprog.z, 600)
+            if rule == "steepest":
+                # the weights kept up to date on every pivot are the exact column norms
+                assert np.allclose(linprog._pricing.weights, 1 + (linprog._engine.A ** 2).sum(axis=0))
+
+    with pytest.raises(ValueError):
+        LinearProgramming(z, Constraints.from_iterable(rows), pricing="random")
+
+    # problems with >= and = rows ( two phases ) end at the optimum of Dantzig whatever the rule
+    rng = np.random.default_rng(7)
+    for _ in range(40):
+        n, m = rng.integers(3, 8), rng.integers(3, 7)
+        a, start = rng.integers(-4, 9, size=(m, n)), rng.integers(0, 6, size=n)
+        ops = rng.choice(["<=", ">=", "="], size=m)
+        b = a @ start + np.select([ops == "<=", ops == ">="], [rng.integers(0, 9, m), -rng.integers(0, 9, m)], 0)
+        rows = [ " ".join(f"{a[i, j]:+d}x{j + 1}" for j in range(n)) + f" {ops[i]} {b[i]}" for i in range(m) ]
+        rows.append(" + ".join(f"x{j + 1}" for j in range(n)) + f" <= {start.sum() + 30}")
+        z = rng.choice(["max", "min"]) + " z = " + " ".join(f"{c:+d}x{j + 1}" for j, c in enumerate(rng.integers(-5, 9, n)))
+        expected = LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows)).silent_calc()
+        assert expected.success
+        for rule in ("steepest", "devex", "partial"):
+            result = LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows), pricing=rule).silent_calc()
+            assert result.success and np.isclose(result.z, expected.z)
+
+
+def test_limits_and_anti_cycling(monkeypatch):
+    import linprog as module
+    z = ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4")
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows), max_iterations=2)
+    linprog.silent_calc()
+    assert linprog.status == module.ITERATION_LIMIT and linprog._pivots == 2
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows), time_limit=0)
+    linprog.silent_calc()
+    assert linprog.status == module.TIME_LIMIT
+
+    unbounded = LinearProgramming(ObjectiveFunction("max z = x1 + x2"), Constraints.from_iterable(["x1 - x2 <= 1"]))
+    unbounded.silent_calc()
+    assert unbounded.status == module.UNBOUNDED
+
+    # Bland's rule from the first pivot still reaches the optimum
+    monkeypatch.setattr(module, "STALL_PIVOTS", 0)
+    for engine in ("tableau", "revised"):
+        linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+        linprog.silent_calc(engine)
+        assert linprog.status == module.OPTIMAL and np.isclose(linprog.z, 600)
+
+
+def test_bounded_variables():
+    z = ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4")
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 <= 30", "x3 <= 20", "x2 >= 5"]
+    expected = {"x1": 30.0, "x2": 30.0, "x3": 20.0, "x4": 50.0}
+
+    detected = LinearProgramming(z, Constraints.from_iterable(rows), detect_bounds=True)
+    assert detected.bounds == {"x1": (0.0, 30.0), "x3": (0.0, 20.0), "x2": (5.0, np.inf)}
+    # the bound rows are not in the tableau anymore
+    assert detected.constraints.shape == (3, 7)
+    for engine in ("tableau", "revised"):
+        detected.silent_calc(engine)
+        assert detected.status == "optimal" and detected.values() == expected
+        assert np.isclose(detected.objective_value(), 660)
+
+    explicit = LinearProgramming(z, Constraints.from_iterable(rows[:3]), bounds={"x1": (None, 30), "x3": (0, 20), "x2": (5, None)})
+    explicit.silent_calc()
+    assert explicit.values() == expected
+
+    infeasible = LinearProgramming(z, Constraints.from_iterable(rows[:3]), bounds={"x1": (40, 30)})
+    infeasible.silent_calc()
+    assert infeasible.status == "infeasible"
+
+
+def test_silent_result(capsys):
+    z = ObjectiveFunction("max W = 7x1 + 5x2 + 5x3 + 4x4")
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+    result = LinearProgramming(z, Constraints.from_iterable(rows)).silent_calc()
+    assert result.success and result.message is None and np.isclose(result.z, 600)
+    assert result.varnames == ["x1", "x2", "x3", "x4"] and result.iterations > 0
+    assert np.isclose(result.values @ [7, 5, 5, 4], 600)
+
+    infeasible = LinearProgramming(ObjectiveFunction("max Z = 24x1 + 20 x2"), Constraints.from_iterable(["x1 + x2 <= 30", "x1 + 2 x2 >= 80"]))
+    result = infeasible.silent_calc()
+    assert result.status == "infeasible" and result.message == "There is no solution for this problem."
+    # nothing is printed by a silent solve, whatever it ends with
+    assert capsys.readouterr().out == ""
+
+    infeasible.calc(verbose=False)
+    assert capsys.readouterr().out == "There is no solution for this problem.\n"
+
+
+def test_result_from_true_basis():
+    # optima found by enumerating the vertices of every problem, not by this solver
+    problems = [
+        ("min z = 100x1 + 50x2 + 200x3", ["x1 + x2 + x3 = 3000", "8x1 + 14x2 + 10x3 <= 42000", "10x1 + 12x2 + 6x3 <= 24000", "x3 >= 300"], 450000),
+        ("max z = 7t1 + 5t2 + 4t3", ["t1 + t2 + t3 <= 25", "2t1 + t2 + t3 <= 100", "t1 + t2 >= -1", "t2 + t3 >= 5"], 165),
+        # redundant equalities, an artificial variable is still basic at 0 after phase 1
+        ("min z = 8x1 - x2", ["-2x1 = 0", "3x1 + 6x2 = 18", "-2x1 + 3x2 = 9", "x1 + x2 <= 23"], -3),
+        ("min z = -3x1 - x2 + 5x4", ["-x1 - 2x2 - 3x3 - 3x4 = -21", "6x1 - x2 + 7x3 - 2x4 = 22", "-2x1 - x2 - 2x3 + 3x4 = 1",
+                                     "x1 + 3x3 + 5x4 = 27", "x1 + x2 + x3 + x4 <= 30"], 13 / 3),
+        # phase 1 ends with rounding noise instead of an exact 0
+        ("min z = x1 + 2x2 + 6x3", ["-x1 + 2x2 + 5x3 = 23", "-2x1 + 2x2 + 4x3 >= 20", "3x1 + 4x2 + 6x3 = 34", "x1 + x2 + x3 <= 27"], 26),
+    ]
+    for z, rows, optimum in problems:
+        for options, solve in (({}, {}), ({}, {"engine": "revised"}), ({}, {"method": "dual"}), ({"presolve": True}, {})):
+            linprog = LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows), **options)
+            result = linprog.silent_calc(**solve)
+            assert result.status == "optimal" and np.isclose(result.z, optimum)
+            # only the variables as written, never a slack, surplus or artificial one
+            assert set(result.varnames) == LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows))._written_vars()
+            # the values satisfy every row and give z
+            values = result.as_dict()
+            for row in rows:
+                left, op, b = Constraint.SPLITTER_PATTERN.split(row)
+                constraint = Constraint(f"{left} {op} {b}")
+                total = constraint.sign * sum( coef * values[var] for var, coef in zip(constraint.varnames, constraint.a[:constraint.structural]) )
+                assert {"=": np.isclose(total, float(b)), "<=": total <= float(b) + 1e-9, ">=": total >= float(b) - 1e-9}[op]
+
+
+def test_same_variables_on_every_engine():
+    z = "max z = 3x1 + 2x2 + x3"
+    rows = ["x1 + x2 + x3 <= 10", "x3 = 2", "x1 <= 4", "x2 >= 1", "x1 + x2 >= 2"]
+    for options, solve in (({}, {}), ({}, {"engine": "revised"}), ({}, {"method": "dual"}), ({"presolve": True}, {})):
+        result = LinearProgramming(ObjectiveFunction(z), Constraints.from_iterable(rows), **options).silent_calc(**solve)
+        assert result.varnames == ["x1", "x2", "x3"] and list(result.values) == [4, 4, 2] and result.z == 22
+
+
+def test_profile():
+    z = ObjectiveFunction("min z = 45x1 + 54x2 + 42x3 + 36x4")
+    rows = ["x1 + x2 + x3 + x4 = 1600", "30x1 + 60x2 + 70x3 + 80x4 = 100000", "30x1 + 40x2 + 20x4 = 30000"]
+    with Profile() as profile:
+        linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+        linprog.silent_calc()
+    assert active() is None
+
+    metrics = json.loads(profile.to_json())
+    assert metrics["calls"]["parse constraint"] == 3 and metrics["calls"]["solve"] == 1
+    assert {"phase 1", "phase 2", "pricing", "ratio test", "pivot"} <= set(metrics["timings"])
+    assert metrics["counters"]["pivots"] == linprog._pivots == len(metrics["iterations"])
+    assert metrics["iterations"][0]["phase"] == "phase 1" and metrics["iterations"][-1]["phase"] == "phase 2"
+
+    # nothing is recorded once the profile is closed
+    LinearProgramming(z, Constraints.from_iterable(rows)).silent_calc()
+    assert profile.calls["solve"] == 1
+
+
+def test_scoped_naming():
+    rows = ["x1 + x2 + s1 <= 4", "x1 + 3x2 >= 6", "x1 - x2 + 2s1 = 1", "2x1 + s1 <= 9"]
+
+    def build(_):
+        with naming():
+            constraints = Constraints.from_iterable(rows)
+            linprog = LinearProgramming(ObjectiveFunction("min z = 3x1 + x2 + s1"), constraints)
+            linprog.silent_calc()
+            return constraints.varnames, linprog.z
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        built = list(executor.map(build, range(32)))
+    assert all( item == built[0] for item in built )
+    # numbered from 1 in every block, 'e' when a written variable already starts with 's'
+    assert built[0] == (["x1", "x2", "e1", "s1", "s2", "e3", "A1", "A2"], pytest.approx(3.5))
+
+    # rows of other blocks, or of none, get new names when theirs are already used by the model
+    z = ObjectiveFunction("max z = 3x1 + 2x2")
+    rows = ["x1 + x2 <= 4", "x1 + 3x2 <= 6", "x1 + x2 >= 1"]
+    with naming():
+        scoped = Constraints.from_iterable(rows[:2])
+    with naming():
+        other = Constraint(rows[2])
+    unscoped = Constraint("x1 <= 3")
+    for merged in (scoped + other + unscoped, Constraints.from_iterable(scoped.constraints + [other, unscoped])):
+        assert len(set(merged.varnames)) == len(merged.varnames) == 7
+        assert len(set(merged.slacks)) == 3 and merged.shape == (4, 7)
+        linprog = LinearProgramming(z, merged)
+        linprog.silent_calc()
+        assert linprog.objective_value() == pytest.approx(11)
+    # the merged rows are not changed
+    assert other.varnames == ["x1", "x2", "s1", "A1"] and scoped.slacks == ["s1", "s2"]
+
+    # the entry points number a model from 1 without a block, whatever was parsed before
+    Constraint("x1 + x2 >= 1")
+    assert Constraints.from_iterable(rows).varnames == ["x1", "x2", "s1", "s2", "s3", "A1"]
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows), presolve=True)
+    assert linprog.constraints.varnames == ["x1", "x2", "s1", "s2", "s3", "A1"]
+    assert solve_many([(z, rows)], workers=1)[0].vbs == ["s3", "s2", "x1"]
+
+
+def test_solve_service(monkeypatch):
+    z = "max W = 7x1 + 5x2 + 5x3 + 4x4"
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+    # the generated slack names do not change the fingerprint ( rows parsed outside of any `naming` block )
+    first, second = ( (ObjectiveFunction(z), Constraints.from_iterable([ Constraint(row) for row in rows ])) for _ in range(2) )
+    assert first[1].slacks != second[1].slacks and fingerprint(*first) == fingerprint(*second)
+
+    async def burst():
+        async with SolveService(workers=2, max_in_flight=1, max_waiting=0) as service:
+            same = [ service.solve(z, rows) for _ in range(8) ]
+            results = await asyncio.gather(*same, service.solve(z, rows[:3]), return_exceptions=True)
+            return service, results
+
+    service, results = asyncio.run(burst())
+    assert all( result.success and np.isclose(result.z, 600) for result in results[:8] )
+    assert service.solved == 1 and service.coalesced == 7
+    # the only slot is taken and no caller may wait
+    assert isinstance(results[8], ServiceBusyError)
+
+    # the event loop keeps running while the pool shuts down
+    import service as module
+    shutdown = module.ProcessPoolExecutor.shutdown
+    monkeypatch.setattr(module.ProcessPoolExecutor, "shutdown", lambda *args: (time.sleep(0.2), shutdown(*args)))
+
+    async def close():
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0.01)
+
+        async with SolveService(workers=1) as service:
+            await service.solve(z, rows)
+            ticker = asyncio.ensure_future(tick())
+        ticker.cancel()
+        return service, len(ticks)
+
+    service, ticks = asyncio.run(close())
+    assert service._executor is None and ticks > 5
+
+
+def test_result_cache(tmp_path):
+    z = "max W = 7x1 + 5x2 + 5x3 + 4x4"
+    rows = ["2x1 + 4x2 + 2x3 + 3 x4 <= 450", "x1 + x2 <= 60", "x3 + x4 <= 70", "x1 + x3 <= 50", "x2 + x4 <= 60"]
+    cache = LRUCache(maxsize=2, path=tmp_path)
+    first = cached_solve(z, rows, cache=cache)
+    assert cached_solve(z, rows, cache=cache) is first and np.isclose(first.z, 600)
+    assert not first.values.flags.writeable
+    # the same model written with its terms in another order
+    assert cached_solve("max W = 4x4 + 5x3 + 5x2 + 7x1", [" x2 + x1 <= 60" if row == "x1 + x2 <= 60" else row for row in rows], cache=cache) is first
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    cached_solve(z, rows[:3], cache=cache)
+    cached_solve(z, rows[:4], cache=cache)
+    # evicted from memory, read back from disk
+    assert len(cache) == 2
+    again = cached_solve(z, rows, cache=cache)
+    assert again is not first and again.values.tolist() == first.values.tolist()
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "disk_hits": 1, "misses": 3}
+
+
+def test_parsed_expression_cache():
+    PARSED.clear()
+    first, second = Constraint("2x1 +  x2 >= 30"), Constraint(" 2x1 + x2 >= 30 ")
+    assert (PARSED.hits, PARSED.misses) == (1, 1)
+    assert first.varnames[:2] == second.varnames[:2] == ["x1", "x2"] and first.b == second.b == 30
+    # every constraint still gets its own slack and artificial variables
+    assert first.artificial != second.artificial and first.varnames[2] != second.varnames[2]
+
+    objfunc = ObjectiveFunction("max z = 3x1 + 2x2")
+    again = ObjectiveFunction("max z = 3x1 + 2x2")
+    assert again.var2ceof == objfunc.var2ceof and again.z is not objfunc.z and PARSED.hits == 2
+    with pytest.raises(NotValidConstraintError):
+        Constraint("x1 + x2 <= a")
+    assert len(PARSED) == 2
+
+
+def test_in_place_tableau(monkeypatch):
+    import linprog as module
+    z = ObjectiveFunction("min z = 45x1 + 54x2 + 42x3 + 36x4")
+    rows = ["x1 + x2 + x3 + x4 = 1600", "30x1 + 60x2 + 70x3 + 80x4 = 100000", "30x1 + 40x2 + 20x4 = 30000"]
+    # blocks of a single row, every pivot loops over them
+    monkeypatch.setattr(module, "PIVOT_BLOCK_CELLS", 1)
+    linprog = LinearProgramming(z, Constraints.from_iterable(rows))
+    linprog.init_mat()
+    buffer = linprog._engine._tableau
+    linprog._primal_iterations(verbose=False)
+    # phase 2 dropped the artificial columns, A and b are still views of the buffer allocated at the start
+    assert linprog.status == "optimal" and np.isclose(linprog.z, 64090.909090)
+    assert np.shares_memory(linprog._engine.A, buffer) and np.shares_memory(linprog._engine.b, buffer)
+
+    for method in ("primal", "dual"):
+        single = LinearProgramming(z, Constraints.from_iterable(rows)).silent_calc(method=method, dtype="float32")
+        assert single.success and np.isclose(single.z, 64090.909090, rtol=1e-5)
+
+    # fractional coefficients leave float32 noise in Cj-Zj, it does not count as an improving column
+    z = ObjectiveFunction("max z = 1.3x1 + 2.7x2 + 0.9x3")
+    rows = ["0.7x1 + 1.9x2 + 2.3x3 <= 10.1", "1.1x1 + 0.3x2 + 0.6x3 <= 7.7", "0.2x1 + 1.4x2 + 0.8x3 <= 5.3"]
+    expected = LinearProgramming(z, Constraints.from_iterable(rows)).silent_calc()
+    for method in ("primal", "dual"):
+        single = LinearProgramming(z, Constraints.from_iterable(rows), max_iterations=50).silent_calc(method=method, dtype="float32")
+        assert single.status == "optimal" and single.iterations == expected.iterations
+        assert np.isclose(single.z, expected.z, rtol=1e-5)
@@ -1,3 +1,5 @@
+import re
+
 
 def get_all_occ(iterable, value):
     """
@@ -6,13 +8,23 @@ def get_all_occ(iterable, value):
     return [ i for i, k in enumerate(iterable) if k == value ]
 
 
+# number at the end of a variable name
+NUMBER_SUFFIX = re.compile(r"(\d+)$")
+
+
 def sorter1(k):
-    if 'e' in k or 's' in k:
-        return 100000 + int(k[1])
-    elif 'a' in k or 'A' in k:
-        return 200000 + int(k[1])
+    """
+    Sort key of a variable name: written variables first, then slack ( e, s ) and artificial ( a, A ) ones,
+    each by the whole number at the end of their name ( x2 before x10 ), names without one come first.
+    """
+    match = NUMBER_SUFFIX.search(k)
+    number = int(match.group(1)) if match else 0
+    if k[0] in 'es':
+        return (1, number, k)
+    elif k[0] in 'aA':
+        return (2, number, k)
     else:
-        return int(k[1])
+        return (0, number, k)
 
 def sorter2(k):
     return sorter1(k[0])
\ No newline at end of file